@@ -47,11 +47,23 @@ source $SLURM_TMPDIR/.venv/bin/activate
 pip install --no-index --upgrade pip
 pip install GitPython matplotlib numpy pandas seaborn chardet --no-index
 
+# -------------------------------------------------------
+# Stage checkpoints of a previous (interrupted) job are kept in persistent storage; bring them back for --resume
+if [ -d "$refresearch/data/output/checkpoints/$ARG" ]; then
+    echo ">>> Restoring checkpoints of repo $ARG."
+    mkdir -p $SLURM_TMPDIR/$repo_name/output/checkpoints
+    rsync -axvH --no-g --no-p $refresearch/data/output/checkpoints/$ARG $SLURM_TMPDIR/$repo_name/output/checkpoints/
+    # the smell events of a checkpoint are read back from their event log
+    if [ -d "$refresearch/data/output/smell_events" ]; then
+        rsync -axvH --no-g --no-p $refresearch/data/output/smell_events $SLURM_TMPDIR/$repo_name/output/
+    fi
+fi
+
 # -------------------------------------------------------
 echo -e "\n\n\n\n\n>>> Executing the script."
 # -u is for unbuffered output so the print statements print it to the slurm out file
 # & at the end is to run the script in background. Unless it's running in background we can't trap the signal
-python -u scripts/analysis.py $ARG &
+python -u scripts/analysis.py $ARG --workers $SLURM_NTASKS_PER_NODE --resume &
 
 PID=$!
 wait ${PID}
@@ -38,12 +38,12 @@ unset JAVA_TOOL_OPTIONS
 virtualenv --no-download $SLURM_TMPDIR/.venv
 source $SLURM_TMPDIR/.venv/bin/activate
 pip install --no-index --upgrade pip
-pip install GitPython --no-index
+pip install GitPython numpy chardet --no-index
 # -------------------------------------------------------
 echo -e "\n\n\n\n\n>>> Executing the script."
 # -u is for unbuffered output so the print statements print it to the slurm out file
 # & at the end is to run the script in background. Unless it's running in background we can't trap the signal
-python -u scripts/data_generation.py designite $ARG &
+python -u scripts/data_generation.py designite $ARG --shards $SLURM_NTASKS_PER_NODE &
 
 PID=$!
 wait ${PID}
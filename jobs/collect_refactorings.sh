@@ -43,7 +43,7 @@ pip install GitPython --no-index
 echo -e "\n\n\n\n\n>>> Executing the script."
 # -u is for unbuffered output so the print statements print it to the slurm out file
 # & at the end is to run the script in background. Unless it's running in background we can't trap the signal
-python -u scripts/data_generation.py refminer $ARG &
+python -u scripts/data_generation.py refminer $ARG --workers $SLURM_NTASKS_PER_NODE &
 
 PID=$!
 wait ${PID}
@@ -3,11 +3,27 @@ from corpus import prepare_repo, flush_repo
 from data_analyzer import RepoDataAnalyzer
 from corpus_analyzer import CorpusAnalyzer
 from utils import GitManager, ColoredStr
+from checkpoint import StageCheckpoint, archive_hash
 import traceback
+import config
+import os
 
-def analyze_repo_data(idx):
+DEFAULT_WORKERS = int(os.environ.get("SLURM_NTASKS_PER_NODE", 8))
+
+# resumable stages of the repo analysis, in order; each one is checkpointed once completed
+PIPELINE_STAGES = [
+    "load_raw_smells",
+    "calculate_smells_lifespan",
+    "load_raw_refactorings",
+    "commits_analysis",
+    "map_refactorings_to_smells"
+]
+
+def analyze_repo_data(idx, workers=DEFAULT_WORKERS, resume=False):
     """
     Analyzes the collected data for a given repository.
+    A checkpoint is saved after each stage; with `resume`, the analysis restarts after the
+    last completed stage of a checkpoint matching the repo, its archives and the code version.
     """
     try:
         (username, repo_name, repo_path) = prepare_repo(idx, clone=True)
@@ -17,14 +33,28 @@ def analyze_repo_data(idx):
         else:
             try:        
                 print(f"\n {ColoredStr.cyan('Analyzing repo data...')}\n[{idx}] Repo: {ColoredStr.blue(repo_path)} | Branch: {ColoredStr.green(branch)}")
-                analyzer = RepoDataAnalyzer(username, repo_name, repo_path, branch)
+                analyzer = RepoDataAnalyzer(username, repo_name, repo_path, branch, workers=workers)
                 analyzer.setup_repo_dataset(idx, username, repo_name)
-                analyzer.load_raw_smells()
-                analyzer.calculate_smells_lifespan()
-                analyzer.load_raw_refactorings()
-                analyzer.commits_analysis()
-                analyzer.map_refactorings_to_smells()
+                checkpoint = StageCheckpoint(idx, [
+                    archive_hash(os.path.join(config.ZIP_LIB, f'smells_{idx}.zip')),
+                    archive_hash(os.path.join(config.ZIP_LIB, f'refs_{idx}.zip')),
+                    analyzer.commit_log.hashes[-1] if len(analyzer.commit_log) else None
+                ])
+                
+                next_stage = 0
+                if resume:
+                    completed_stage, state = checkpoint.load()
+                    if completed_stage in PIPELINE_STAGES and analyzer.restore_checkpoint_state(state):
+                        next_stage = PIPELINE_STAGES.index(completed_stage) + 1
+                        print(f"Resuming after stage {ColoredStr.green(completed_stage)} from checkpoint: {checkpoint.file_path}")
+                    else:
+                        print("No usable checkpoint to resume from, starting from the first stage.")
+                
+                for stage in PIPELINE_STAGES[next_stage:]:
+                    getattr(analyzer, stage)()
+                    checkpoint.save(stage, analyzer.get_checkpoint_state())
                 analyzer.save_data_to_json(username, repo_name)
+                checkpoint.clear()
             except Exception as e:
                 print(ColoredStr.red(e))
                 traceback.print_exc()
@@ -48,10 +78,12 @@ def analyze_corpus_data():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run analysis on repo index or entire corpus")
     parser.add_argument("idx", type=int, nargs="?", help="index of the repository to process. If not provided, corpus analysis will be performed.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of worker processes for parallel stages (defaults to the Slurm tasks per node, or 8).")
+    parser.add_argument("--resume", action="store_true", help="resume the repo analysis from its last checkpointed stage.")
     args = parser.parse_args()
     
     if args.idx is not None:
-        analyze_repo_data(args.idx)
+        analyze_repo_data(args.idx, workers=args.workers, resume=args.resume)
     else:
         analyze_corpus_data()
     
\ No newline at end of file
@@ -0,0 +1,89 @@
+import os
+import gzip
+import pickle
+import hashlib
+import zipfile
+import config
+
+# modules whose code shapes the analyzer state; editing any of them invalidates checkpoints
+CODE_MODULES = [
+    "analysis.py", "checkpoint.py", "data_analyzer.py", "models.py", "utils.py", "smell_store.py",
+    "smell_map.py", "timeline.py", "java_parser.py", "zip.py"
+]
+
+def code_version():
+    """
+    Get a version of the analysis code, hashed from the sources of the pipeline modules.
+    """
+    sha = hashlib.sha256()
+    for module in CODE_MODULES:
+        with open(os.path.join(config.CURR_DIR, module), 'rb') as file:
+            sha.update(file.read())
+    return sha.hexdigest()[:16]
+
+def archive_hash(zip_path):
+    """
+    Hash an archive from its central directory (member names, CRCs and sizes), which changes
+    whenever any member does, without decompressing it. Returns None if the archive is missing.
+    """
+    if not os.path.exists(zip_path):
+        return None
+    sha = hashlib.sha256()
+    with zipfile.ZipFile(zip_path, 'r') as zip_file:
+        for info in zip_file.infolist():
+            sha.update(f"{info.filename}\0{info.CRC}\0{info.file_size}\n".encode())
+    return sha.hexdigest()[:16]
+
+class StageCheckpoint:
+    """
+    Checkpoint of the last completed stage of a repo analysis, stored as a gzipped pickle under
+    `config.CHECKPOINT_PATH/<idx>/<key>.pkl.gz`. The key covers the repo index, the input
+    archive hashes and the code version, so stale checkpoints are never resumed from.
+    """
+    def __init__(self, idx, inputs: list):
+        """
+        :param idx: Index of the repository.
+        :param inputs: Fingerprints of the inputs of the analysis (e.g. archive hashes, branch head).
+        """
+        self.idx = idx
+        key_source = "|".join([str(idx)] + [str(i) for i in inputs] + [code_version()])
+        self.key = hashlib.sha256(key_source.encode()).hexdigest()[:16]
+        self.dir_path = os.path.join(config.CHECKPOINT_PATH, str(idx))
+        self.file_path = os.path.join(self.dir_path, f"{self.key}.pkl.gz")
+
+    def load(self):
+        """
+        Load the checkpoint.
+
+        :return: Tuple of (completed stage, state), or (None, None) if there is no usable checkpoint.
+        """
+        if not os.path.exists(self.file_path):
+            return None, None
+        try:
+            with gzip.open(self.file_path, 'rb') as file:
+                checkpoint = pickle.load(file)
+            return checkpoint["stage"], checkpoint["state"]
+        except Exception as e:
+            print(f"Ignoring unreadable checkpoint {self.file_path}: {e}")
+            return None, None
+
+    def save(self, stage, state: dict):
+        """
+        Save the state after a completed stage, replacing older checkpoints of the repo.
+        """
+        os.makedirs(self.dir_path, exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=3) as file:
+            pickle.dump({"stage": stage, "state": state}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.file_path)     # never leave a half-written checkpoint behind
+        self._remove_others()
+
+    def clear(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        self._remove_others()
+
+    def _remove_others(self):
+        for name in os.listdir(self.dir_path) if os.path.isdir(self.dir_path) else []:
+            if name != os.path.basename(self.file_path):
+                os.remove(os.path.join(self.dir_path, name))
@@ -15,14 +15,30 @@ CORPUS_SPECS_PATH  = os.path.join(BIN_PATH, "data", "corpus_spec.json")
 REPOS_PATH = os.path.join(ROOT_PATH, "repos")
 CORPUS_PATH = os.path.join(ROOT_PATH, "corpus")
 OUTPUT_PATH = os.path.join(ROOT_PATH, "output")
+WORKTREES_PATH = os.path.join(ROOT_PATH, "worktrees")
 ZIP_LIB = os.path.join(OUTPUT_PATH, "zips")
+MANIFEST_PATH = os.path.join(ZIP_LIB, "manifests")
 PLOTS_PATH = os.path.join(OUTPUT_PATH, "plots")
 MANUAL_ANALYSIS_PATH = os.path.join(OUTPUT_PATH, "manual_analysis")
 MANUAL_ANALYSIS_FOR_UNMAPPED_PATH = os.path.join(OUTPUT_PATH, "manual_analysis_for_unmapped")
 
 SMELL_REF_MAP_PATH = os.path.join(OUTPUT_PATH, "smell_ref_map")
+SMELL_EVENTS_PATH = os.path.join(OUTPUT_PATH, "smell_events")
+SMELL_MAP_SHARD_SIZE = None     # records per smell map shard, None writes a single file per repo
+CACHE_PATH = os.path.join(OUTPUT_PATH, "cache")
+METHOD_END_LINE_CACHE_PATH = os.path.join(CACHE_PATH, "method_end_lines")
+METHOD_END_LINE_CACHE_SIZE = 1_000_000     # max (blob, start line) entries kept in memory
+PERSIST_METHOD_END_LINE_CACHE = True
+CHECKPOINT_PATH = os.path.join(OUTPUT_PATH, "checkpoints")     # restored from persistent storage by jobs/analyze_repo.sh
 
 SMELL_SKIP_COLS = ["Project Name"]
+ZIP_READ_THREADS = 4     # threads decompressing archive members ahead of the smell parser
+DESIGNITE_SHARDS = 1     # concurrent Designite JVMs per repo, 1 runs a single `-aco` pass
+DESIGNITE_SKIP_UNCHANGED_JAVA = True     # per-commit runs alias commits whose Java sources equal the previous commit's
+DESIGNITE_CONVERT_OUTPUT = True     # convert commit outputs into smell tables in the background
+REFMINER_WORKERS = 1     # concurrent RefactoringMiner JVMs per repo, 1 runs a single `-a` pass
+REFMINER_WINDOWS_PER_WORKER = 4     # history windows per JVM, smaller windows make retries cheaper
+REFMINER_WINDOW_RETRIES = 2
 
 class OpenAI:
     MODEL = "gpt-4o-mini"
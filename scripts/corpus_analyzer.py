@@ -5,6 +5,7 @@ import concurrent.futures
 import pandas as pd
 import numpy as np
 from utils import FileUtils
+from smell_map import SmellMapReader, list_smell_maps
 
 DF_COLS = [
     "repo_name", "smell_kind", "smell_type", "is_alive",
@@ -49,25 +50,22 @@ class CorpusAnalyzer:
         return df
             
     def generate_corpus(self):
-        maps = [
-            file_path for file_path in FileUtils.traverse_directory(self.lib_dir)
-            if file_path.endswith('.json') and not file_path.endswith('.stats.json') and not file_path.endswith('.chain.json')
-        ]
+        maps = list_smell_maps(self.lib_dir)
         total_maps = len(maps)
         print(f"Found {total_maps} maps to process.")
         
         processed = itertools.count(1)  # thread-safe counter
         
-        def process_map(file_path):
-            repo_full_name = os.path.basename(file_path).replace('.json', '')
-            smell_instances, map_chain_data = self.get_repo_data(file_path)
+        def process_map(repo_map: SmellMapReader):
+            repo_full_name = repo_map.name
+            smell_instances, map_chain_data = self.get_repo_data(repo_map)
             result = self.convert_to_rows(repo_full_name, smell_instances, map_chain_data)
             count = next(processed)
             # print(f"\rProcessed {count}/{total_maps} maps.", end="", flush=True)
             return result
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            futures = [executor.submit(process_map, file_path) for file_path in maps]
+            futures = [executor.submit(process_map, repo_map) for repo_map in maps]
 
             # with open(self.corpus_bin, "w") as f:
             #     f.write(",".join(DF_COLS) + "\n")  # Write headers
@@ -85,30 +83,33 @@ class CorpusAnalyzer:
 
         print(f"\nCorpus saved at {self.corpus_bin}")
         
-    def get_repo_data(self, map_path):
-        map_data = FileUtils.load_json_file(map_path)
-        map_chain_data = FileUtils.load_json_file(map_path.replace('.json', '.chain.json'))
-        smell_instances = map_data.get("smell_instances", [])
+    def get_repo_data(self, repo_map: SmellMapReader):
+        map_chain_data = FileUtils.load_json_file(repo_map.chain_path)
+        smell_instances = []
         
-        # normalize smell instances for data analysis
-        for si in smell_instances:
-            
-            si["smell_kind"] = si["smell_versions"][-1]["smell_kind"]
-            si["smell_type"] = si["smell_versions"][-1]["smell_name"]
-            # del si["smell_versions"]
-            
-            # commit info
-            si["introduced_commit_hash"] = si["commit_versions"][0]["commit_hash"]
-            si["introduced_commit_date"] = si["commit_versions"][0]["datetime"]
-            si["removed_commit_hash"] = si["commit_versions"][-1]["commit_hash"]
-            si["removed_commit_date"] = si["commit_versions"][-1]["datetime"]
-            # del si["commit_versions"]
-            
-            # refactorings pairs
-            if si.get("introduced_by_refactorings"):
-                si["introduced_by_refactorings"] = [ref["type_name"] for ref in si["introduced_by_refactorings"]]
-            if si.get("removed_by_refactorings"):
-                si["removed_by_refactorings"] = [ref["type_name"] for ref in si["removed_by_refactorings"]]
+        # normalize smell instances for data analysis while streaming, keeping only what the rows use
+        for si in repo_map.iter_smell_instances(resolve_refactorings=True):
+            smell_versions = si["smell_versions"]
+            commit_versions = si["commit_versions"]
+            smell_instances.append({
+                "smell_versions": smell_versions[-1:],
+                "movements": len(smell_versions),
+                "smell_kind": smell_versions[-1]["smell_kind"],
+                "smell_type": smell_versions[-1]["smell_name"],
+                
+                # commit info
+                "commit_versions": [commit_versions[0], commit_versions[-1]],
+                "introduced_commit_hash": commit_versions[0]["commit_hash"],
+                "introduced_commit_date": commit_versions[0]["datetime"],
+                "removed_commit_hash": commit_versions[-1]["commit_hash"],
+                "removed_commit_date": commit_versions[-1]["datetime"],
+                "commit_span": si["commit_span"],
+                "days_span": si["days_span"],
+                
+                # refactorings pairs
+                "introduced_by_refactorings": [ref["type_name"] for ref in si.get("introduced_by_refactorings") or []],
+                "removed_by_refactorings": [ref["type_name"] for ref in si.get("removed_by_refactorings") or []],
+            })
         
         return smell_instances, map_chain_data
         
@@ -143,7 +144,7 @@ class CorpusAnalyzer:
                 "smell_kind": smell_kind,
                 "smell_type": smell_type,
                 "is_alive": is_alive,
-                "movements": len(si["smell_versions"]), # number of movements soley based on smell info
+                "movements": si["movements"], # number of movements soley based on smell info
                 "chain_length": len(c.get("chain")),
                 "total_commits_span": span_c,
                 "total_days_span": span_d,
@@ -1,16 +1,215 @@
 import os
-import shutil
+import io
 import re
+import json
+import queue
+import threading
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from runners import Designite, RefMiner
 import config
-from utils import GitManager, GitUtils, FileUtils
+from utils import GitManager, GitUtils, FileUtils, PathIndex, IntervalIndex, MethodEndLineCache
 from utils import log_execution, merge_ranges
 from models import SmellInstance, Smell, Refactoring, CommitInfo, DESIGN_SMELL, IMP_SMELL
-from zip import unzip_file
+from zip import ZipDataset, open_zip_dataset, close_zip_datasets
+from timeline import CommitTimeline
+from smell_store import SmellDeltaEncoder, SmellEventLog
+from smell_map import SmellMapWriter
+
+SMELL_CSVS = ["DesignSmells.csv", "ImplementationSmells.csv"]
+SMELL_TABLE_FILE = "SmellTable.json"     # smell CSVs of a commit converted to a column-oriented table
+SMELL_TABLE_COLUMNS = ["smell_kind", "package_name", "type_name", "method_name", "method_start_ln", "smell_name"]
+
+def get_smell_kind(csv_name):
+    match = re.match(r"(\w+)Smells\.csv", csv_name)
+    if match:
+        return match.group(1)
+    else:
+        raise ValueError(f"Invalid smell csv name: {csv_name}")
+
+def parse_designite_commit(commit_path, zip_path=None):
+    """
+    Parse the smell CSVs of one Designite commit directory into a compact table.
+    Runs in worker processes, so it only returns plain tuples and dicts.
+
+    :param commit_path: Path to the commit directory, or the directory member when `zip_path` is given.
+    :param zip_path: Path to the smells archive holding the commit directory (opened once per process).
+    :return: See `parse_smell_csvs`.
+    """
+    if zip_path is None:
+        if os.path.exists(os.path.join(commit_path, SMELL_TABLE_FILE)):
+            return parse_smell_files(os.path.basename(commit_path), {SMELL_TABLE_FILE: os.path.join(commit_path, SMELL_TABLE_FILE)})
+        csv_files = {
+            csv: os.path.join(commit_path, csv) for csv in SMELL_CSVS
+            if os.path.exists(os.path.join(commit_path, csv))
+        }
+    else:
+        dataset = open_zip_dataset(zip_path)
+        if dataset.exists(f"{commit_path}/{SMELL_TABLE_FILE}"):
+            return parse_smell_files(os.path.basename(commit_path), {SMELL_TABLE_FILE: dataset.open_text(f"{commit_path}/{SMELL_TABLE_FILE}")})
+        csv_files = {
+            csv: dataset.open_text(f"{commit_path}/{csv}") for csv in SMELL_CSVS
+            if dataset.exists(f"{commit_path}/{csv}")
+        }
+    return parse_smell_csvs(os.path.basename(commit_path), csv_files)
+
+def parse_smell_files(commit_hash, smell_files: dict):
+    """
+    Parse the smells of one commit from its converted smell table if present, otherwise from its smell CSVs.
+
+    :param smell_files: File name -> path or open text stream, for the smell files present.
+    :return: See `parse_smell_csvs`.
+    """
+    if SMELL_TABLE_FILE not in smell_files:
+        return parse_smell_csvs(commit_hash, smell_files)
+    table_file = smell_files[SMELL_TABLE_FILE]
+    if isinstance(table_file, str):
+        with open(table_file, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    else:
+        data = json.load(table_file)
+    columns = data["columns"]
+    smell_table = list(zip(*(columns[column] for column in SMELL_TABLE_COLUMNS)))
+    return commit_hash, smell_table, data["counts"]
+
+def convert_designite_commit(commit_path) -> bool:
+    """
+    Convert the smell CSVs of a Designite commit directory into a `SmellTable.json` in the same
+    directory, which `load_raw_smells` reads instead of the CSVs. The table is written under a
+    temporary name and renamed once complete.
+
+    :return: False if the directory has no smell CSV (or only holds an alias) and nothing was written.
+    """
+    if os.path.exists(os.path.join(commit_path, Designite.ALIAS_FILE)):
+        return False
+    _, smell_table, smell_counts = parse_designite_commit(commit_path)
+    if smell_table is None:
+        return False
+    columns = {column: [row[i] for row in smell_table] for i, column in enumerate(SMELL_TABLE_COLUMNS)}
+    table_path = os.path.join(commit_path, SMELL_TABLE_FILE)
+    with open(f"{table_path}.tmp", "w", encoding="utf-8") as file:
+        json.dump({"columns": columns, "counts": smell_counts}, file)
+    os.replace(f"{table_path}.tmp", table_path)
+    return True
+
+class SmellTableConverter:
+    """
+    Background converter of completed Designite commit directories into smell tables (see
+    `convert_designite_commit`). Sharded runs submit each directory once it is moved into place,
+    so CSV parsing overlaps with the detection of the remaining commits.
+    """
+    def __init__(self, workers=1):
+        self.converted = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, commit_path):
+        self._queue.put(commit_path)
+
+    def _run(self):
+        while True:
+            commit_path = self._queue.get()
+            if commit_path is None:
+                return
+            try:
+                converted = convert_designite_commit(commit_path)
+                with self._lock:
+                    self.converted += converted
+            except Exception as e:
+                print(f"Failed to convert {commit_path}: {e}")
+                with self._lock:
+                    self.failed += 1
+
+    def close(self):
+        """
+        Convert the remaining submitted directories and stop the workers.
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+def read_smell_alias(commit_path, dataset: ZipDataset = None):
+    """
+    Get the commit whose Designite output a commit directory refers to, for commits that were not
+    analyzed because their Java sources are identical to that commit's.
+
+    :param dataset: The smells archive holding the commit directory, if it is not read from disk.
+    :return: The hash of the aliased commit, or None if the directory holds its own output.
+    """
+    if dataset is None:
+        alias_path = os.path.join(commit_path, Designite.ALIAS_FILE)
+        if not os.path.exists(alias_path):
+            return None
+        with open(alias_path, "r") as file:
+            return file.read().strip()
+    alias_path = f"{commit_path}/{Designite.ALIAS_FILE}"
+    return dataset.read(alias_path).decode().strip() if dataset.exists(alias_path) else None
+
+def parse_smell_csvs(commit_hash, csv_files: dict):
+    """
+    Parse the smell CSVs of one commit into a compact table.
+
+    :param commit_hash: Hash of the commit.
+    :param csv_files: Smell CSV name -> path or open text stream, for the CSVs present.
+    :return: Tuple of (commit hash, smell table, smell counts). The smell table is a list of
+        (smell_kind, package_name, type_name, method_name, method_start_ln, smell_name) rows
+        without duplicates, or None if the commit has no smell CSV. Smell counts map
+        smell kind -> smell name -> number of rows (duplicates included).
+    """
+    smell_table = None
+    smell_counts = {}
+    
+    for csv in SMELL_CSVS:
+        if csv not in csv_files:
+            continue
+        smell_kind = get_smell_kind(csv)
+        
+        if smell_table is None:
+            smell_table = []
+        kind_counts = smell_counts.setdefault(smell_kind, {})
+        seen_rows = set()
+        
+        for smell_row in FileUtils.load_csv_file(csv_files[csv], skipCols=config.SMELL_SKIP_COLS):
+            method_start_line = smell_row.get("Method start line no", None)
+            smell_name = smell_row.get(f"{smell_kind} Smell", None)
+            kind_counts[smell_name] = kind_counts.get(smell_name, 0) + 1
+            
+            row = (
+                smell_kind,
+                smell_row.get("Package Name", None),
+                smell_row.get("Type Name", None),
+                smell_row.get("Method Name", None),
+                int(method_start_line) if method_start_line else None,
+                smell_name
+            )
+            if row in seen_rows:    # to remove duplicates
+                continue
+            seen_rows.add(row)
+            smell_table.append(row)
+    
+    return commit_hash, smell_table, smell_counts
 
 class RepoDataAnalyzer:
-    def __init__(self, username: str, repo_name: str, repo_path: str, branch: str):
+    # attributes filled by the pipeline stages, saved in stage checkpoints; the smell events are
+    # reloaded from their event log instead
+    CHECKPOINT_STATE = (
+        "repo_stats", "active_commits", "pairs_lib", "refactorings",
+        "unmapped_refactorings", "present_smell_types", "present_refactoring_types"
+    )
+    
+    def __init__(self, username: str, repo_name: str, repo_path: str, branch: str, workers: int = 1):
         self.slurm_dir = os.environ.get("SLURM_TMPDIR", None)
         # self.slurm_dir = "tmp/"
         if self.slurm_dir is None:
@@ -19,14 +218,27 @@ class RepoDataAnalyzer:
         self.repo_path = repo_path
         self.repo_designite_output_path = os.path.join(self.slurm_dir, "output", "Designite_OP", username, repo_name)
         self.repo_refminer_output_path = os.path.join(RefMiner.output_dir, username, f"{repo_name}.json")
+        self.smells_dataset: ZipDataset = None      # archives opened by setup_repo_dataset; the output paths
+        self.refs_dataset: ZipDataset = None        # above are read instead when they are not set
+        self.repo_refminer_member = f"{repo_name}.json"
+        self.smell_events_path = os.path.join(config.SMELL_EVENTS_PATH, f"{repo_name}@{username}.events.jsonl")
         
         self.repo_stats = {}
+        self.workers = workers      # processes used for parallel stages
         
         self.branch = branch
-        self.active_commits: list[tuple[str, datetime]] = []
-        self.all_commits: list[tuple[str, datetime]] = GitManager.get_all_commits(repo_path, branch)
-        self.all_commits_order = {commit_hash: index for index, (commit_hash, _) in enumerate(self.all_commits)}
-        self.smells: dict[str, list[Smell]] = {}                # smells dictionary for each commit
+        self.git_session = GitManager.open_session(repo_path)    # shared for the analyzer's lifetime
+        self.method_end_line_cache = MethodEndLineCache(
+            max_size=config.METHOD_END_LINE_CACHE_SIZE,
+            file_path=os.path.join(config.METHOD_END_LINE_CACHE_PATH, f"{repo_name}@{username}.json") if config.PERSIST_METHOD_END_LINE_CACHE else None,
+            version=GitUtils.METHOD_END_LINE_VERSION
+        )
+        self.active_commits: list[tuple[str, datetime]] = []   # filled from the timeline once smells are loaded
+        self.commit_log = GitManager.get_commit_log(repo_path, branch)
+        self.timeline = CommitTimeline(self.commit_log)
+        self.all_commits: list[tuple[str, datetime]] = self.commit_log.pairs()
+        self.all_commits_order = self.timeline.order
+        self.smell_events = SmellEventLog()                     # smell changes of the active commits, in timeline order
         self.refactorings: dict[str, list[Refactoring]] = {}    # refactorings dictionary for each commit
         
         self.pairs_lib: list[SmellInstance] = []               # list of smell instances mapped to refactorings
@@ -38,65 +250,79 @@ class RepoDataAnalyzer:
         
     @log_execution
     def setup_repo_dataset(self, idx, username, repo_name):
-        
+        """
+        Open the smells and refactorings archives of the repo. Members are streamed from
+        the archives by the loaders, nothing is extracted to scratch.
+        """
         if not os.path.exists(config.ZIP_LIB):
             raise RuntimeError(f"ZIP_LIB directory not found: {config.ZIP_LIB}")
         
         # Smells dataset setup
         try:
-            SMELLS_DIR = os.path.join(self.slurm_dir, "output", "Designite_OP",  username, repo_name)
-            if os.path.exists(SMELLS_DIR):
-                shutil.rmtree(SMELLS_DIR)
-                
-            os.makedirs(SMELLS_DIR)
-
-            target_dir = os.path.join(self.slurm_dir, "output", "Designite_OP",  username, repo_name)
-            unzip_file(os.path.join(config.ZIP_LIB, f'smells_{idx}.zip'), target_dir)
+            self.smells_dataset = ZipDataset(os.path.join(config.ZIP_LIB, f'smells_{idx}.zip'))
         except Exception as e:
             raise RuntimeError(f"Failed to set up smells dataset for {username}/{repo_name}: {e}")
         
         # Refactoring dataset setup
         try:
-            REFS_DIR = os.path.join(RefMiner.output_dir, username)
-            if not os.path.exists(REFS_DIR):
-                os.makedirs(REFS_DIR)
-                
-            target_dir = os.path.join(RefMiner.output_dir, username)
-            unzip_file(os.path.join(config.ZIP_LIB, f'refs_{idx}.zip'), target_dir)
+            self.refs_dataset = ZipDataset(os.path.join(config.ZIP_LIB, f'refs_{idx}.zip'))
+            self.repo_refminer_member = f"{repo_name}.json"
         except Exception as e:
             raise RuntimeError(f"Failed to set up refactoring dataset for {username}/{repo_name}: {e}")
         
+    def get_checkpoint_state(self) -> dict:
+        """
+        Get the state built by the completed pipeline stages.
+        """
+        state = {name: getattr(self, name) for name in self.CHECKPOINT_STATE}
+        state["active_timeline"] = bytes(self.timeline.active)
+        state["smell_events"] = (len(self.smell_events), len(self.smell_events.store))
+        return state
+    
+    def restore_checkpoint_state(self, state: dict) -> bool:
+        """
+        Restore the state saved by `get_checkpoint_state`, reading the smell events back from the
+        event log written by `load_raw_smells`.
+
+        :return: False if the event log is missing or does not match the checkpoint; nothing is restored then.
+        """
+        smell_events = SmellEventLog()
+        if state["smell_events"] != (0, 0):
+            if not os.path.exists(self.smell_events_path):
+                print(f"Smell event log of the checkpoint not found: {self.smell_events_path}")
+                return False
+            try:
+                smell_events = SmellEventLog.load(self.smell_events_path)
+            except Exception as e:
+                print(f"Unreadable smell event log {self.smell_events_path}: {e}")
+                return False
+            if (len(smell_events), len(smell_events.store)) != state["smell_events"]:
+                print(f"Smell event log does not match the checkpoint: {self.smell_events_path}")
+                return False
+        for name in self.CHECKPOINT_STATE:
+            setattr(self, name, state[name])
+        self.timeline.active[:] = state["active_timeline"]
+        self.smell_events = smell_events
+        return True
+        
     @log_execution
     def flush_repo_dataset(self):
-        # Smells dataset cleanup
-        try:
-            if os.path.exists(self.repo_designite_output_path):
-                shutil.rmtree(self.repo_designite_output_path)
-                print(f"Flushed smells dataset directory: {self.repo_designite_output_path}")
-            else:
-                print(f"Smells dataset directory not found for cleanup: {self.repo_designite_output_path}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to flush smells dataset: {e}")
-    
-        # Refactoring dataset cleanup
-        try:
-            if os.path.exists(self.repo_refminer_output_path):
-                if os.path.isdir(self.repo_refminer_output_path):
-                    shutil.rmtree(self.repo_refminer_output_path)
-                    print(f"Flushed refactoring dataset directory: {self.repo_refminer_output_path}")
-                else:
-                    os.remove(self.repo_refminer_output_path)
-                    print(f"Flushed refactoring dataset file: {self.repo_refminer_output_path}")
-            else:
-                print(f"Refactoring dataset path not found for cleanup: {self.repo_refminer_output_path}")
-        except Exception as e:
-            raise RuntimeError(f"Failed to flush refactoring dataset: {e}")
+        GitManager.close_session(self.repo_path)
+        
+        for dataset in (self.smells_dataset, self.refs_dataset):
+            if dataset is not None:
+                dataset.close()
+                print(f"Closed dataset archive: {dataset.zip_path}")
+        close_zip_datasets()
+        self.smells_dataset = None
+        self.refs_dataset = None
         
     @log_execution
     def load_raw_smells(self):
         """
         Load raw smells from Designite output.
-        Will load smells for active commits only.
+        Will load smells for active commits only, delta-encoded into smell events
+        (introduced, removed and moved smells per commit) that are persisted as JSON lines.
         """
         designite_stats = {
             "smells_collected": {
@@ -112,49 +338,38 @@ class RepoDataAnalyzer:
             }
         }
         
-        for commit_path in FileUtils.traverse_directory(self.repo_designite_output_path):
-            commit_hash = os.path.basename(commit_path)
-            if commit_hash.endswith('.csv'):
-                continue
-            
-            designite_stats["commits_analyzed"]["hashes"].append(commit_hash)
-            designite_stats["commits_analyzed"]["total"] += 1
-            commit_datetime = next((dt for ch, dt in self.all_commits if ch == commit_hash), None)
-            if commit_datetime:
-                self.active_commits.append((commit_hash, commit_datetime))
+        if self.smells_dataset is not None:
+            commit_paths = self.smells_dataset.list_dirs()
+        else:
+            commit_paths = [
+                commit_path for commit_path in FileUtils.traverse_directory(self.repo_designite_output_path)
+                if not commit_path.endswith(('.csv', Designite.ALIAS_FILE, SMELL_TABLE_FILE))
+            ]
+        designite_stats["commits_analyzed"]["hashes"] = [os.path.basename(commit_path) for commit_path in commit_paths]
+        
+        # Parse in timeline order so each snapshot is delta-encoded against the previous one and dropped
+        unknown_idx = len(self.timeline)
+        commit_paths.sort(key=lambda commit_path: self.timeline.index(os.path.basename(commit_path), unknown_idx))
+        plan, parse_paths = self._plan_smell_parsing(commit_paths)
+        designite_stats["commits_analyzed"]["unchanged"] = sum(1 for _, parse in plan if not parse)
+        encoder = SmellDeltaEncoder(self.smell_events.store)
+        parsed_tables = self._parse_smell_tables(parse_paths)
+        prev_counts = {}
+        
+        for commit_hash, parse in plan:
+            if parse:
+                _, smell_table, smell_counts = next(parsed_tables)
+            else:   # zero-change commit, same smells as the previous active commit
+                smell_table, smell_counts = None, prev_counts
+            for smell_kind, kind_counts in smell_counts.items():
+                collected = designite_stats["smells_collected"][smell_kind]
+                for smell_name, count in kind_counts.items():
+                    collected[smell_name] = collected.get(smell_name, 0) + count
             
-            for csv in ["DesignSmells.csv", "ImplementationSmells.csv"]:
-                csv_path = os.path.join(commit_path, csv)
-                smell_kind = self._get_smell_kind(csv)
-                if os.path.exists(csv_path):
-                    smell_instances = []
-                    smell_hashes = set()
-                    
-                    smells_data = FileUtils.load_csv_file(csv_path, skipCols=config.SMELL_SKIP_COLS)
-                    for smell_row in smells_data:
-                        package_name = smell_row.get("Package Name", None)
-                        type_name = smell_row.get("Type Name", None)
-                        method_name = smell_row.get("Method Name", None)
-                        method_start_line = smell_row.get("Method start line no", None)
-                        smell_name = smell_row.get(f"{smell_kind} Smell", None)
-                        designite_stats["smells_collected"][smell_kind][smell_name] = designite_stats["smells_collected"][smell_kind].get(smell_name, 0) + 1
-                        
-                        # cause = smell_row.get("Cause of the Smell", None)
-                        
-                        smell_instance = Smell(package_name, smell_kind, smell_name)
-                        smell_instance.type_name = type_name
-                        smell_instance.method_name = method_name
-                        smell_instance.method_start_ln = int(method_start_line) if method_start_line else None
-                        
-                        if smell_instance.full_hash() in smell_hashes: # to remove duplicates
-                            continue
-                        
-                        smell_instances.append(smell_instance)
-                        smell_hashes.add(smell_instance.full_hash())
-                    
-                    if commit_hash not in self.smells:
-                        self.smells[commit_hash] = []
-                    self.smells[commit_hash].extend(smell_instances)
+            if self.timeline.mark_active(commit_hash):
+                if parse:
+                    self.smell_events.append(encoder.push(commit_hash, smell_table))
+                prev_counts = smell_counts
 
         designite_stats["smells_collected"]["total_design_smells"] = sum(designite_stats["smells_collected"][DESIGN_SMELL].values())
         designite_stats["smells_collected"]["total_imp_smells"] = sum(designite_stats["smells_collected"][IMP_SMELL].values())
@@ -165,68 +380,115 @@ class RepoDataAnalyzer:
         designite_stats["commits_analyzed"]["total"] = len(designite_stats["commits_analyzed"]["hashes"])
     
         self.repo_stats["designite_stats"] = designite_stats
+        self.active_commits = self.timeline.active_commits()
+        self.smell_events.save(self.smell_events_path)
+        print(f"Encoded {len(self.smell_events.store)} smell introductions in {len(self.smell_events)} events: {self.smell_events_path}")
                     
-    def _get_smell_kind(self, csv_name):
-        match = re.match(r"(\w+)Smells\.csv", csv_name)
-        if match:
-            return match.group(1)
-        else:
-            raise ValueError(f"Invalid smell csv name: {csv_name}")
+    def _plan_smell_parsing(self, commit_paths: list[str]):
+        """
+        Decide which commit directories (in timeline order) have to be parsed. A commit aliased to the
+        previous active commit (its Java sources are unchanged) is a zero-change commit and is not parsed.
+        Any other alias falls back to the output of the commit it refers to, and is skipped like that
+        commit when it has no output.
+
+        :return: Tuple of ([(commit hash, parse)], directories to parse in the order of the parsed commits).
+        """
+        paths = {os.path.basename(commit_path): commit_path for commit_path in commit_paths}
+        aliases = {}
+        for commit_hash, commit_path in paths.items():
+            target = read_smell_alias(commit_path, self.smells_dataset)
+            if target is not None:
+                aliases[commit_hash] = target
+
+        plan, parse_paths = [], []
+        prev_source = None      # commit whose output the previous active commit has
+        for commit_path in commit_paths:
+            commit_hash = os.path.basename(commit_path)
+            target = aliases.get(commit_hash)
+            if target is None:
+                source = commit_hash
+                plan.append((commit_hash, True))
+                parse_paths.append(commit_path)
+            elif target == prev_source:
+                source = target
+                plan.append((commit_hash, False))
+            elif target in paths and target not in aliases:
+                source = target
+                plan.append((commit_hash, True))
+                parse_paths.append(paths[target])
+            else:
+                continue
+            if commit_hash in self.timeline:
+                prev_source = source
+        return plan, parse_paths
+
+    def _parse_smell_tables(self, commit_paths: list[str]):
+        """
+        Parse the Designite output of each commit directory, fanning the directories out
+        to a process pool when more than one worker is configured. Results are yielded in
+        the order of `commit_paths`, so the outcome is identical to the serial path.
+        """
+        zip_path = self.smells_dataset.zip_path if self.smells_dataset is not None else None
+        if self.workers <= 1 or len(commit_paths) < 2:
+            if zip_path:
+                yield from self._parse_zipped_smell_tables(commit_paths)
+            else:
+                yield from map(parse_designite_commit, commit_paths)
+            return
+        
+        # each worker process reopens the archive and decompresses its own members
+        chunksize = max(1, len(commit_paths) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from executor.map(partial(parse_designite_commit, zip_path=zip_path), commit_paths, chunksize=chunksize)
+    
+    def _parse_zipped_smell_tables(self, commit_paths: list[str]):
+        """
+        Parse the Designite output of each commit directory of the smells archive, with the
+        smell table or CSV members decompressed ahead on `config.ZIP_READ_THREADS` threads.
+        """
+        members = []
+        for commit_path in commit_paths:
+            if self.smells_dataset.exists(f"{commit_path}/{SMELL_TABLE_FILE}"):
+                members.append(f"{commit_path}/{SMELL_TABLE_FILE}")
+            else:
+                members += [f"{commit_path}/{csv}" for csv in SMELL_CSVS if self.smells_dataset.exists(f"{commit_path}/{csv}")]
+        contents = self.smells_dataset.iter_members(members, workers=config.ZIP_READ_THREADS)
+        pending = next(contents, None)
+        for commit_path in commit_paths:
+            csv_files = {}
+            # a directory can be listed twice in a row when an alias falls back to it
+            while pending is not None and pending[0].rpartition('/')[0] == commit_path and pending[0].rpartition('/')[2] not in csv_files:
+                member, data = pending
+                csv_files[member.rpartition('/')[2]] = io.TextIOWrapper(io.BytesIO(data))
+                pending = next(contents, None)
+            yield parse_smell_files(os.path.basename(commit_path), csv_files)
     
     @log_execution
     def calculate_smells_lifespan(self):
-        sorted_active_commits = sorted(self.active_commits, key=lambda x: self.all_commits_order.get(x[0], float('inf')))
-        live_smells: dict[int, SmellInstance] = {}
+        live_smells: dict[int, SmellInstance] = {}      # smell row -> instance
+        store = self.smell_events.store
         
-        previous_commit = None
-        for curr_commit, curr_commit_datetime in sorted_active_commits:
-            added_smells: list[Smell] = []
-            removed_smells: list[Smell] = []
+        for event in self.smell_events:     # timeline order, commits without smell changes are skipped
+            commit_hash, commit_datetime = event.commit_hash, self.timeline.datetime(event.commit_hash)
             
-            if previous_commit:
-                 # Get smells from the previous and current commit for comparison
-                prev_smells = self.smells.get(previous_commit, [])
-                curr_smells = self.smells.get(curr_commit, [])
-                prev_smell_hashes = {smell.hash(): smell for smell in prev_smells}
-                curr_smell_hashes = {smell.hash(): smell for smell in curr_smells}
-                
-                # Find added smells
-                for curr_smell_hash, curr_smell in curr_smell_hashes.items():
-                    if curr_smell_hash not in prev_smell_hashes:
-                        added_smells.append(curr_smell)
-                    else:
-                        prev_smell = prev_smell_hashes[curr_smell_hash]
-                        if curr_smell.smell_kind == IMP_SMELL and prev_smell.smell_kind == IMP_SMELL:
-                            # Check if the smell has moved
-                            if curr_smell.method_start_ln != prev_smell.method_start_ln:
-                                live_smells[curr_smell_hash].add_new_version(
-                                    changed_method_start_ln=curr_smell.method_start_ln, 
-                                    commit_info=CommitInfo(curr_commit, curr_commit_datetime)
-                                )
-
-                # Find removed smells
-                for prev_smell_hash, prev_smell in prev_smell_hashes.items():
-                    if prev_smell_hash not in curr_smell_hashes:
-                        removed_smells.append(prev_smell)
-                
-            else:       # Handle the first commit, where there is no previous commit for comparison
-                added_smells = self.smells.get(curr_commit, [])
+            # Follow Implementation smells whose method has moved
+            for row, method_start_ln in event.moved:
+                live_smells[row].add_new_version(
+                    changed_method_start_ln=method_start_ln, 
+                    commit_info=CommitInfo(commit_hash, commit_datetime)
+                )
             
-            # Add new added smells to live_smells
-            for smell in added_smells:
-                smell_inst = SmellInstance(smell, CommitInfo(curr_commit, curr_commit_datetime))
-                live_smells[smell_inst.latest_smell().hash()] = smell_inst
+            # Add new added smells to live_smells (Smell objects are only built for these)
+            for row in event.introduced:
+                live_smells[row] = SmellInstance(store.smell(row), CommitInfo(commit_hash, commit_datetime))
                 
             # Pop removed smells from live_smells
-            for smell in removed_smells:
-                if smell.hash() in live_smells:
-                    smell_inst = live_smells[smell.hash()]
-                    smell_inst.add_removed_version(CommitInfo(curr_commit, curr_commit_datetime))
+            for row in event.removed:
+                smell_inst = live_smells.pop(row, None)
+                if smell_inst is not None:
+                    smell_inst.add_removed_version(CommitInfo(commit_hash, commit_datetime))
                     smell_inst.is_alive = False
                     self.pairs_lib.append(smell_inst)
-                    live_smells.pop(smell_inst.latest_smell().hash())
-
-            previous_commit = curr_commit
             
         # Handle any remaining live smells (probably never removed)
         for _, smell_inst in live_smells.items():
@@ -264,18 +526,17 @@ class RepoDataAnalyzer:
                         methods_info_map[smell_commit_hash][file_path] = {}
                     methods_info_map[smell_commit_hash][file_path][smell.method_name] = [smell.method_start_ln, None]
                     
-        # calculates end line for each method
-        for commit_hash, methods_data in methods_info_map.items():
-            for file_path, methods_data in methods_data.items():
-                for method_name, method_range in methods_data.items():
-                    method_start_ln = method_range[0]
-                    method_end_ln = GitUtils.get_method_end_line_at_commit(self.repo_path, commit_hash, file_path, method_name, method_start_ln)
-                    
-                    if method_end_ln == -1:
-                        # print(ColoredStr.orange(f"Failed to find method_end_ln: {commit_hash} | {file_path} | {method_name}"))
-                        method_end_ln = None
-                    
-                    methods_data[method_name][1] = method_end_ln
+        # calculates end line for each method (batched per blob)
+        GitUtils.get_methods_end_lines(self.repo_path, methods_info_map, cache=self.method_end_line_cache)
+        self.method_end_line_cache.save()
+        print(f"Method end line cache: {self.method_end_line_cache.hits} hits, {self.method_end_line_cache.misses} misses")
+        decoder = self.git_session.decoder
+        print(f"Source decoding: {decoder.stats} (chardet fallback {decoder.fallback_ratio():.2%})")
+        for files_data in methods_info_map.values():
+            for methods_data in files_data.values():
+                for method_range in methods_data.values():
+                    if method_range[1] == -1:
+                        method_range[1] = None
                 
         # updates smell instances with end line info
         for smell_instance in self.pairs_lib:
@@ -301,15 +562,21 @@ class RepoDataAnalyzer:
             }
         }
         
-        for commit in FileUtils.load_json_file(self.repo_refminer_output_path).get("commits"):
-            if any(commit.get("sha1") == active_commit[0] for active_commit in self.active_commits):
+        # stream RefMiner commits one at a time; Refactoring objects are built for active commits only
+        if self.refs_dataset is not None:
+            refminer_output = self.refs_dataset.open_text(self.repo_refminer_member) if self.refs_dataset.exists(self.repo_refminer_member) else None
+        else:
+            refminer_output = self.repo_refminer_output_path
+        for commit in FileUtils.iter_json_array(refminer_output, "commits") if refminer_output else []:
+            if self.timeline.is_active(commit.get("sha1")):
                 commit_hash = commit.get("sha1")
                 refs = commit.get("refactorings")
                 url = commit.get("url")
                 
                 refactoring_instances = []
-                for ref in refs:
-                    refactoring_instance = Refactoring(url, commit_hash, ref.get("type", None), ref.get("description", None))
+                first_ordinal = len(self.refactorings.get(commit_hash, []))
+                for ordinal, ref in enumerate(refs, start=first_ordinal):
+                    refactoring_instance = Refactoring(url, commit_hash, ref.get("type", None), ref.get("description", None), ordinal)
                     for location in ref.get("leftSideLocations"):
                         refactoring_instance.add_left_change(
                             file_path=location.get("filePath"), 
@@ -349,10 +616,13 @@ class RepoDataAnalyzer:
         Analyze the commits to identify refactorings vs feature developments.
         """
         commits_info: dict = {}
-        # Collect commit messages and changes for all commits
+        # Collect commit messages and changes for all commits (single streaming pass)
+        streamed = {
+            commit_hash: (commit_msg, changes)
+            for commit_hash, commit_msg, changes in self.git_session.iter_commit_changes(self.branch)
+        }
         for commit_hash, _ in self.all_commits:
-            changes = GitManager.get_changes_at_commit(self.repo_path, commit_hash)
-            commit_msg = GitManager.get_commit_message(self.repo_path, commit_hash)
+            commit_msg, changes = streamed.pop(commit_hash, ("", {}))
             
             commits_info[commit_hash] = {
                 "commit_message": commit_msg,
@@ -425,43 +695,44 @@ class RepoDataAnalyzer:
     
     @log_execution
     def map_refactorings_to_smells(self):
+        ref_indexes: dict[tuple[str, str], tuple[PathIndex, dict[str, IntervalIndex]]] = {}    # (commit, side) -> refactoring location index
+        matched_paths: dict[tuple[str, str, str], set[str]] = {}
+        
+        def get_mapped_refs(commit_hash, side, smell_file_path, smell_kind, smell_range):
+            refs = self.refactorings.get(commit_hash, [])
+            if not refs:
+                return []
+            if (commit_hash, side) not in ref_indexes:
+                ref_indexes[(commit_hash, side)] = self._build_ref_index(commit_hash, side)
+            path_index, buckets = ref_indexes[(commit_hash, side)]
+            key = (commit_hash, side, smell_file_path)
+            if key not in matched_paths:
+                matched_paths[key] = path_index.match_file(smell_file_path)
+            
+            ref_ordinals = set()
+            for file_path in matched_paths[key]:
+                if smell_kind == IMP_SMELL:
+                    ref_ordinals.update(buckets[file_path].stab(*smell_range))
+                else:   # for Design smells, no range check in a file
+                    ref_ordinals.update(buckets[file_path].values())
+            return [refs[ordinal] for ordinal in sorted(ref_ordinals)]     # keep the refactorings' order
+        
         for smell_instance in self.pairs_lib:
             smell_instance.removed_by_refactorings = []
             smell_instance.introduced_by_refactorings = []
-            introuced_commit_hash = smell_instance.get_introduced_at()
-            removed_commit_hash = smell_instance.get_removed_at()
+            smell_kind = smell_instance.get_smell_kind()
+            smell_file_path = smell_instance.get_file_path()
                 
             # Map refactorings that introduced the smell
-            refs = self.refactorings.get(introuced_commit_hash, [])
-            for ref in refs:
-                for rc in ref.right_changes:
-                    # check if the smell file path intersects with the refactoring file path
-                    if rc.file_path and self._check_file_intersection(smell_instance.get_file_path(), target_path=rc.file_path):
-                        if smell_instance.get_smell_kind() == IMP_SMELL:
-                            if self._check_smell_ref_intersection(smell_instance.introduced_smell().get_range(), rc.range):
-                                ref.is_mapped_to_introduction = True
-                                smell_instance.introduced_by_refactorings.append(ref)
-                                break
-                        else: # for Design smells, no range check in a file
-                            ref.is_mapped_to_introduction = True
-                            smell_instance.introduced_by_refactorings.append(ref)
-                            break
+            for ref in get_mapped_refs(smell_instance.get_introduced_at(), "right", smell_file_path, smell_kind, smell_instance.introduced_smell().get_range()):
+                ref.is_mapped_to_introduction = True
+                smell_instance.introduced_by_refactorings.append(ref)
                 
             # Map refactorings that removed the smell
             if not smell_instance.is_alive:
-                refs = self.refactorings.get(removed_commit_hash, [])
-                for ref in refs:
-                    for lc in ref.left_changes:
-                        if lc.file_path and self._check_file_intersection(smell_instance.get_file_path(), target_path=lc.file_path):
-                            if smell_instance.get_smell_kind() == IMP_SMELL:
-                                if self._check_smell_ref_intersection(smell_instance.latest_smell().get_range(), lc.range):
-                                    ref.is_mapped_to_removal = True
-                                    smell_instance.removed_by_refactorings.append(ref)
-                                    break
-                            else: # for Design smells, no range check in a file
-                                ref.is_mapped_to_removal = True
-                                smell_instance.removed_by_refactorings.append(ref)
-                                break
+                for ref in get_mapped_refs(smell_instance.get_removed_at(), "left", smell_file_path, smell_kind, smell_instance.latest_smell().get_range()):
+                    ref.is_mapped_to_removal = True
+                    smell_instance.removed_by_refactorings.append(ref)
                                 
         # Collect unmapped refactorings
         for _, refs in self.refactorings.items():
@@ -469,24 +740,27 @@ class RepoDataAnalyzer:
                 if not ref.is_mapped_to_removal or not ref.is_mapped_to_introduction:
                     self.unmapped_refactorings.append(ref)
     
+    def _build_ref_index(self, commit_hash, side):
+        """
+        Index the refactoring locations of a commit side: a path index over the refactored
+        file paths, and per file path an interval index of the location ranges whose values
+        are the positions of the refactorings in the commit.
+        """
+        locations: dict[str, list[tuple[int, int, int]]] = {}
+        for ordinal, ref in enumerate(self.refactorings.get(commit_hash, [])):
+            changes = ref.right_changes if side == "right" else ref.left_changes
+            for rc in changes:
+                if rc.file_path:
+                    ref_start, ref_end = rc.range
+                    locations.setdefault(rc.file_path, []).append((ref_start, ref_end, ordinal))
+        buckets = {file_path: IntervalIndex(intervals) for file_path, intervals in locations.items()}
+        return PathIndex(list(locations)), buckets
+    
     def _check_file_intersection(self, smell_file_path, target_path: str):
         """
         Check if the smell file path intersects with the target path.
         """
-        is_intersected = False
-        
-        if smell_file_path == "<All packages>":
-            is_intersected = True
-        elif target_path.endswith(smell_file_path):
-            is_intersected = True
-        else:
-            target_pkg_path = '/'.join(target_path.split('/')[:-1])
-            target_extension = target_path.split('.')[-1]
-            if target_pkg_path and target_extension:
-                if target_pkg_path.endswith(smell_file_path) and target_extension == "java":
-                    is_intersected = True
-            
-        return is_intersected
+        return PathIndex.is_file_match(smell_file_path, target_path)
                 
     def _check_smell_ref_intersection(self, smell_range: tuple[int, int], refactoring_range: tuple[int, int]):
         """
@@ -506,35 +780,34 @@ class RepoDataAnalyzer:
     @log_execution
     def save_data_to_json(self, username, repo_name):
         """
-        Save the smell lifespan data and its statistics to JSON files.
+        Save the smell lifespan data (streamed as NDJSON records, see `SmellMapWriter`)
+        and its statistics to JSON files.
         """
         
         relative_repo_path = os.path.relpath(self.repo_path, start=config.ROOT_PATH)
         sorted_active_commits = sorted(self.active_commits, key=lambda x: x[1])
         
         # save smell lifespan data
-        data = {
-            "metadata": {
+        with SmellMapWriter(config.SMELL_REF_MAP_PATH, f"{repo_name}@{username}", shard_size=config.SMELL_MAP_SHARD_SIZE) as writer:
+            writer.write("metadata", {
                 "path": relative_repo_path,
                 "branch": self.branch,
                 "commit_range": {
                     "start": sorted_active_commits[0][0],
                     "end": sorted_active_commits[-1][0]
                 },
-            },
-            "smell_instances": [smell_instance.to_dict() for smell_instance in self.pairs_lib],
-            "unmapped_refactorings": [ref.to_dict() for ref in self.unmapped_refactorings]
-        }
-        FileUtils.save_json_file(
-            file_path=os.path.join(config.SMELL_REF_MAP_PATH, f"{repo_name}@{username}.json"), 
-            data=data
-        )
+            })
+            # refactorings are stored once and referred to by id from smell instances
+            for refs in self.refactorings.values():
+                for ref in refs:
+                    writer.write("refactoring", ref.to_dict())
+            for smell_instance in self.pairs_lib:
+                writer.write("smell_instance", smell_instance.to_dict())
+            for ref in self.unmapped_refactorings:
+                writer.write("unmapped_refactoring", {"id": ref.ref_id})
         
         # save repo stats data
-        serializable_commits = [
-            (commit_hash, commit_datetime.isoformat() if hasattr(commit_datetime, "isoformat") else str(commit_datetime))
-            for commit_hash, commit_datetime in self.all_commits
-        ]
+        serializable_commits = self.commit_log.to_serializable()
         stats_data = {
             "designite_stats": self.repo_stats.get("designite_stats", None),
             "refminer_stats": self.repo_stats.get("refminer_stats", None),
@@ -1,21 +1,46 @@
 import argparse
 import traceback
+import json
 import os
 import config
 import shutil
 from corpus import prepare_repo, flush_repo
+from data_analyzer import SmellTableConverter
+from manifest import CollectionManifest
 from runners import Designite, RefMiner
 from utils import GitManager, ColoredStr
-from zip import zip_dir
+from zip import zip_dir, ZipDataset
 
-def execute_designite(idx, username, repo_name, repo_path, branch):
+def execute_designite(idx, username, repo_name, repo_path, branch, shards=1, incremental=False):
     """
     Collects code smells for a given repository. 
+    With more than one shard, commit ranges are analyzed by concurrent Designite JVMs.
+    In incremental mode, only the commits missing from the collection manifest are analyzed
+    and their output is appended to the existing smells archive.
+    Completed commit outputs are converted into smell tables in the background: as each shard
+    finishes a commit, or once a single `-aco` run exited.
     """
     success = False
+    zip_path = os.path.join(config.ZIP_LIB, f'smells_{idx}.zip')
+    manifest = CollectionManifest.load("designite", idx)
+    commits = GitManager.get_commit_log(repo_path, branch).hashes
+    append = incremental and len(manifest) > 0 and os.path.exists(zip_path)
+    if incremental and not append:
+        print(ColoredStr.orange("No previous collection found, analyzing the full history"))
+    converter = SmellTableConverter() if config.DESIGNITE_CONVERT_OUTPUT else None
+    on_commit = converter.submit if converter else None
     try:
         designite_runner = Designite()
-        return_code = designite_runner.analyze_commits(username, repo_name, repo_path, branch)
+        if append:
+            new_commits = manifest.new_commits(commits)
+            print(f"Incremental collection: {len(new_commits)} new of {len(commits)} commits")
+            if not new_commits:
+                return
+            return_code = designite_runner.analyze_commits_sharded(username, repo_name, repo_path, branch, shards, commits=new_commits, on_commit=on_commit)
+        elif shards > 1:
+            return_code = designite_runner.analyze_commits_sharded(username, repo_name, repo_path, branch, shards, on_commit=on_commit)
+        else:
+            return_code = designite_runner.analyze_commits(username, repo_name, repo_path, branch, on_commit=on_commit)
         
         if return_code != 0:
             success = False
@@ -25,6 +50,10 @@ def execute_designite(idx, username, repo_name, repo_path, branch):
     except Exception as e:
         print(ColoredStr.red(e))
         traceback.print_exc()
+    finally:
+        if converter:
+            converter.close()   # every converted table is in place before zipping
+            print(f"Converted {converter.converted} commit outputs into smell tables ({converter.failed} failed)")
 
     if success:
         try:
@@ -33,7 +62,9 @@ def execute_designite(idx, username, repo_name, repo_path, branch):
                 print(f"Error: Target path '{target_dir}' does not exist.")
                 exit(1)
             
-            zip_dir(target_dir, os.path.join(config.ZIP_LIB, f'smells_{idx}.zip'))
+            if zip_dir(target_dir, zip_path, append=append):
+                manifest.update(branch, GitManager.get_first_parent_chain(repo_path, branch)[-1], commits)
+                manifest.save()
             
             # Flush the smells dataset directory after zipping
             shutil.rmtree(target_dir)
@@ -43,15 +74,51 @@ def execute_designite(idx, username, repo_name, repo_path, branch):
             traceback.print_exc()
         
 
-def execute_refminer(idx, username, repo_name, repo_path, branch):
+def merge_refminer_output(zip_path, output_path):
+    """
+    Merge the commits already stored in a refactorings archive into a new RefactoringMiner output,
+    so that the output can replace the archive. Commits present in both are taken from the new output.
+
+    :param zip_path: Path to the existing refs_<idx>.zip.
+    :param output_path: Path to the new `<repo>.json` output (a member of the same name is read from the archive).
+    """
+    member = os.path.basename(output_path)
+    with ZipDataset(zip_path) as dataset:
+        if not dataset.exists(member):
+            return
+        with dataset.open_text(member) as file:
+            existing_commits = json.load(file).get("commits", [])
+
+    with open(output_path, "r") as file:
+        new_commits = json.load(file).get("commits", [])
+    new_shas = {commit["sha1"] for commit in new_commits}
+    merged_commits = [commit for commit in existing_commits if commit["sha1"] not in new_shas] + new_commits
+    with open(output_path, "w") as file:
+        json.dump({"commits": merged_commits}, file)
+    print(f"Merged {len(new_commits)} new commit(s) into {len(existing_commits)} collected before")
+
+def execute_refminer(idx, username, repo_name, repo_path, branch, workers=1, incremental=False):
     """
     Collects refactorings for a given repository.
+    With more than one worker, history windows are mined by concurrent RefactoringMiner JVMs.
+    In incremental mode, only the history after the branch head recorded in the collection
+    manifest is mined and merged into the existing refactorings archive.
     """
     success = False
+    zip_path = os.path.join(config.ZIP_LIB, f'refs_{idx}.zip')
+    manifest = CollectionManifest.load("refminer", idx)
+    chain = GitManager.get_first_parent_chain(repo_path, branch)
+    # a head that is no longer on the branch (rewritten history) cannot be continued from
+    since = manifest.head if incremental and manifest.head in chain and os.path.exists(zip_path) else None
+    if incremental and since is None:
+        print(ColoredStr.orange("No previous collection found, mining the full history"))
     try:
         ref_miner_runner = RefMiner(print_log=True)
-        ref_miner_runner.analyze(username, repo_name, repo_path, branch)
-        success = True
+        if since is not None or workers > 1:
+            success = ref_miner_runner.analyze_windows(username, repo_name, repo_path, branch, workers, since=since) == 0
+        else:
+            ref_miner_runner.analyze(username, repo_name, repo_path, branch)
+            success = True
     except Exception as e:
         print(ColoredStr.red(e))
         traceback.print_exc()
@@ -63,7 +130,11 @@ def execute_refminer(idx, username, repo_name, repo_path, branch):
                 print(f"Error: Target path '{target_dir}' does not exist.")
                 exit(1)
             
-            zip_dir(target_dir, os.path.join(config.ZIP_LIB, f'refs_{idx}.zip')) 
+            if since is not None:
+                merge_refminer_output(zip_path, os.path.join(target_dir, f"{repo_name}.json"))
+            if zip_dir(target_dir, zip_path):
+                manifest.update(branch, chain[-1], GitManager.get_commit_log(repo_path, branch).hashes)
+                manifest.save()
             
             # Flush the refactoring dataset directory after zipping
             if os.path.isdir(target_dir):
@@ -80,6 +151,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run analysis on repo index")
     parser.add_argument("tool", type=str, help="tool to use for analysis")
     parser.add_argument("idx", type=int, help="index of the repository to process.")
+    parser.add_argument("--shards", type=int, default=config.DESIGNITE_SHARDS, help="number of concurrent Designite JVMs (designite only).")
+    parser.add_argument("--workers", type=int, default=config.REFMINER_WORKERS, help="number of concurrent RefactoringMiner JVMs (refminer only).")
+    parser.add_argument("--incremental", action="store_true", help="only analyze commits missing from the collection manifest and add them to the existing archive.")
     args = parser.parse_args()
 
     TOOL = args.tool
@@ -93,9 +167,9 @@ if __name__ == "__main__":
         
         if default_branch:
             if TOOL == "designite":
-                execute_designite(REPO_IDX, username, repo_name, repo_path, branch=default_branch)
+                execute_designite(REPO_IDX, username, repo_name, repo_path, branch=default_branch, shards=args.shards, incremental=args.incremental)
             elif TOOL == "refminer":
-                execute_refminer(REPO_IDX, username, repo_name, repo_path, branch=default_branch)
+                execute_refminer(REPO_IDX, username, repo_name, repo_path, branch=default_branch, workers=args.workers, incremental=args.incremental)
         else:
             print(ColoredStr.red(f"Failed to get default branch for repo: {repo_path}"))
             traceback.print_exc()
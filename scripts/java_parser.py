@@ -0,0 +1,204 @@
+import re
+from bisect import bisect_right
+
+TYPE_KEYWORDS = frozenset({"class", "interface", "enum"})
+IDENTIFIER_REGEX = re.compile(r"(?:[^\W\d]|\$)[\w$]*")
+
+# One alternation per lexical element that matters for brace matching. Everything else
+# (operators, numbers, whitespace) falls between matches and is skipped by finditer.
+TOKEN_REGEX = re.compile(r'''
+    (?P<nl>\n)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*(?:.*?\*/|.*))
+  | (?P<text_block>"""(?:[^\\]|\\.)*?(?:"""|$))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?)
+  | (?P<char>'(?:[^'\\\n]|\\.)*'?)
+  | (?P<ident>(?:[^\W\d]|\$)[\w$]*)
+  | (?P<punct>[{}();@.<])
+''', re.S | re.X)
+
+class JavaRange:
+    def __init__(self, kind, name, lead_line, start_line, open_line):
+        self.kind: str = kind               # type, method, block
+        self.name: str = name
+        self.lead_line: int = lead_line     # first line of the declaration incl. leading comments
+        self.start_line: int = start_line   # first code line of the declaration
+        self.open_line: int = open_line     # line of the opening brace
+        self.end_line: int = None           # line of the closing brace (None if unbalanced)
+
+    def contains(self, line):
+        return self.end_line is not None and self.start_line <= line <= self.end_line
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "lead_line": self.lead_line,
+            "start_line": self.start_line,
+            "open_line": self.open_line,
+            "end_line": self.end_line
+        }
+
+def _is_record_declaration(tokens: list[str], i):
+    """
+    `record` is a contextual keyword: it only declares a type when followed by a name and then
+    the record header or type parameters (`record Point(` / `record Pair<`), not e.g. in `LogRecord record)`.
+    """
+    return (
+        (i == 0 or tokens[i - 1] != '.')
+        and i + 2 < len(tokens)
+        and IDENTIFIER_REGEX.fullmatch(tokens[i + 1]) is not None
+        and tokens[i + 2] in ('(', '<')
+    )
+
+def _classify(head: list[tuple[str, int]], parent_kind, parent_name=None, enum_constant=False, in_expression=False):
+    """
+    Classify a brace block from the tokens of its declaration head.
+
+    :param enum_constant: The block opens in the constant list of an enum, i.e. it is a constant's class body.
+    :param in_expression: The block opens inside parentheses, e.g. a lambda body passed as an argument.
+    """
+    tokens = [t for t, _ in head]
+    for i, token in enumerate(tokens):
+        if token in TYPE_KEYWORDS and (i == 0 or tokens[i - 1] != '.'):     # skip `Foo.class`
+            return "type", tokens[i + 1] if i + 1 < len(tokens) else None
+        if token == "record" and _is_record_declaration(tokens, i):
+            return "type", tokens[i + 1]
+    if ')' not in tokens:
+        if enum_constant and tokens:
+            return "type", tokens[-1]
+        if parent_kind == "type" and tokens and tokens[-1] == parent_name:
+            return "method", parent_name    # compact constructor of a record
+        return "block", None
+
+    # name is the identifier before the last top-level parenthesis group
+    last_close = len(tokens) - 1 - tokens[::-1].index(')')
+    paren_depth = 0
+    name = None
+    for i in range(last_close, -1, -1):
+        if tokens[i] == ')':
+            paren_depth += 1
+        elif tokens[i] == '(':
+            paren_depth -= 1
+            if paren_depth == 0:
+                name = tokens[i - 1] if i > 0 else None
+                break
+    trailing = tokens[last_close + 1:]
+    if "new" in tokens or enum_constant:
+        return "type", name                 # anonymous class or enum constant body
+    if in_expression:
+        return "block", name
+    if parent_kind == "type" and (not trailing or trailing[0] == "throws"):
+        return "method", name
+    return "block", name
+
+def scan_java_ranges(source: str) -> list[JavaRange]:
+    """
+    Scan a Java source once and return the range of every brace block (types, methods
+    and inner blocks), in order of their opening brace. Braces inside comments, string,
+    character and text block literals are ignored. Lines are 1-based.
+    """
+    ranges: list[JavaRange] = []
+    stack: list[tuple[JavaRange, list, int, int]] = []     # (range, saved head, saved paren depth, saved lead line)
+    enum_constants: set[int] = set()    # stack depths of the enums whose constant list is not closed yet
+    head: list[tuple[str, int]] = []
+    lead_line = None
+    paren_depth = 0
+    line = 1
+
+    for match in TOKEN_REGEX.finditer(source):
+        kind = match.lastgroup
+        if kind == "nl":
+            line += 1
+            continue
+        token = match.group()
+        token_line = line
+        if kind in ("block_comment", "text_block", "string", "char"):
+            line += token.count('\n')
+        if kind in ("line_comment", "block_comment"):
+            if lead_line is None:
+                lead_line = token_line
+            continue
+        if lead_line is None:
+            lead_line = token_line
+
+        if kind != "punct":
+            head.append((token if kind == "ident" else '"', token_line))
+        elif token == '{':
+            parent_kind, parent_name = (stack[-1][0].kind, stack[-1][0].name) if stack else ("type", None)
+            range_kind, name = _classify(
+                head, parent_kind, parent_name,
+                enum_constant=paren_depth == 0 and len(stack) in enum_constants, in_expression=paren_depth > 0
+            )
+            start_line = head[0][1] if head else token_line
+            java_range = JavaRange(range_kind, name, min(lead_line, start_line), start_line, token_line)
+            ranges.append(java_range)
+            stack.append((java_range, head, paren_depth, lead_line))
+            if range_kind == "type" and any(t == "enum" for t, _ in head):
+                enum_constants.add(len(stack))
+            head, lead_line, paren_depth = [], None, 0
+        elif token == '}':
+            if stack:
+                enum_constants.discard(len(stack))
+                java_range, saved_head, saved_paren_depth, saved_lead_line = stack.pop()
+                java_range.end_line = token_line
+                if saved_paren_depth > 0:   # block inside an expression, e.g. a lambda argument
+                    head, lead_line, paren_depth = saved_head, saved_lead_line, saved_paren_depth
+                    continue
+            head, lead_line, paren_depth = [], None, 0
+        elif token == ';' and paren_depth == 0:
+            enum_constants.discard(len(stack))     # the members of an enum follow its constants
+            head, lead_line = [], None
+        else:
+            if token == '(':
+                paren_depth += 1
+            elif token == ')':
+                paren_depth = max(paren_depth - 1, 0)
+            head.append((token, token_line))
+
+    return ranges
+
+class JavaSourceRanges:
+    """
+    All brace ranges of one Java source, scanned once and queried many times.
+    """
+    def __init__(self, source: str):
+        self.ranges = scan_java_ranges(source)
+        self._open_lines = [r.open_line for r in self.ranges]
+
+    def method_range(self, start_line, method_name=None) -> JavaRange:
+        """
+        Get the range of the member declared at the given line. The line may point
+        anywhere from the member's leading comments/annotations to its opening brace.
+        Methods are preferred over other blocks, and members named `method_name` over others.
+        """
+        if not start_line:
+            return None
+        candidates = []
+        # only ranges opened at or after start_line can be declared at it
+        for idx in range(bisect_right(self._open_lines, start_line - 1), len(self.ranges)):
+            java_range = self.ranges[idx]
+            if java_range.lead_line > start_line:
+                break
+            if java_range.end_line is not None:
+                candidates.append(java_range)
+        if not candidates:
+            return None
+        candidates.sort(key=lambda r: (r.kind != "method", method_name is not None and r.name != method_name))
+        return candidates[0]
+
+    def enclosing_ranges(self, line, kind=None) -> list[JavaRange]:
+        """
+        Get all ranges (optionally of one kind) containing the given line, outermost first.
+        """
+        return [
+            r for r in self.ranges[:bisect_right(self._open_lines, line)]
+            if r.contains(line) and (kind is None or r.kind == kind)
+        ]
+
+    def method_end_line(self, start_line, method_name=None):
+        """
+        Get the end line of the member declared at the given line, or -1 if not found.
+        """
+        java_range = self.method_range(start_line, method_name)
+        return java_range.end_line if java_range else -1
@@ -0,0 +1,58 @@
+import os
+import json
+import config
+
+class CollectionManifest:
+    """
+    Commits of a repository already analyzed by a collection tool (`designite` or `refminer`),
+    stored as `config.MANIFEST_PATH/<tool>_<idx>.json` next to the archive the results went to.
+    Incremental collection only runs the tool on commits missing from the manifest.
+    """
+    def __init__(self, tool, idx):
+        self.tool = tool
+        self.idx = idx
+        self.file_path = os.path.join(config.MANIFEST_PATH, f"{tool}_{idx}.json")
+        self.branch = None
+        self.head = None        # branch head at the last collection
+        self.commits: set[str] = set()
+
+    def __len__(self):
+        return len(self.commits)
+
+    def __contains__(self, commit_hash):
+        return commit_hash in self.commits
+
+    @staticmethod
+    def load(tool, idx) -> "CollectionManifest":
+        """
+        Load the manifest of a repository; an empty manifest is returned if none was saved yet.
+        """
+        manifest = CollectionManifest(tool, idx)
+        if os.path.exists(manifest.file_path):
+            with open(manifest.file_path, "r") as file:
+                data = json.load(file)
+            manifest.branch = data.get("branch")
+            manifest.head = data.get("head")
+            manifest.commits = set(data.get("commits", []))
+        return manifest
+
+    def new_commits(self, commits: list[str]) -> list[str]:
+        """
+        Get the commits that were not analyzed yet, in the given order.
+        """
+        return [commit_hash for commit_hash in commits if commit_hash not in self.commits]
+
+    def update(self, branch, head, commits: list[str]):
+        """
+        Record newly analyzed commits and the branch head they were collected up to.
+        """
+        self.branch = branch
+        self.head = head
+        self.commits.update(commits)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"branch": self.branch, "head": self.head, "commits": sorted(self.commits)}, file)
+        os.replace(tmp_path, self.file_path)
@@ -4,6 +4,7 @@ import config
 import pandas as pd
 from sklearn.metrics import cohen_kappa_score
 from utils import FileUtils
+from smell_map import list_smell_maps
 from corpus_analyzer import DF_COLS
 
 class SampleGenerator:
@@ -87,42 +88,44 @@ class SampleGenerator:
     
     def get_all_samples(self, top_k_pairs):
         all_samples = {}
-        paths = list(FileUtils.traverse_directory(self.lib_dir))
-        for file_path in random.sample(paths, len(paths)):
-            file_path: str
-            if file_path.endswith('.json') and not file_path.endswith('.stats.json') and not file_path.endswith('.chain.json'):
-                repo_full_name = os.path.basename(file_path).replace('.json', '')
-                map_data = FileUtils.load_json_file(file_path)
-                metadata = map_data.get("metadata", {})
-                map_chain_data = FileUtils.load_json_file(file_path.replace('.json', '.chain.json'))
-                smell_instances = map_data.get("smell_instances", [])
+        repo_maps = list_smell_maps(self.lib_dir)
+        for repo_map in random.sample(repo_maps, len(repo_maps)):
+            repo_full_name = repo_map.name
+            metadata = repo_map.metadata
+            map_chain_data = FileUtils.load_json_file(repo_map.chain_path)
+            # only the latest item of each chain is sampled, so keep just those while streaming
+            latest_chain_items = {c.get("chain")[-1] for c in map_chain_data}
+            smell_instances = {
+                idx: si for idx, si in enumerate(repo_map.iter_smell_instances(resolve_refactorings=True))
+                if idx in latest_chain_items
+            }
+            
+            for c in map_chain_data:
+                c: dict
                 
-                for c in map_chain_data:
-                    c: dict
-                    
-                    latest_chain_item = c.get("chain")[-1]
-                    si = self._get_smell_instance(smell_instances, latest_chain_item)
+                latest_chain_item = c.get("chain")[-1]
+                si = self._get_smell_instance(smell_instances, latest_chain_item)
             
-                    si_smell_type = si["smell_versions"][-1]["smell_name"]
-                    if si_smell_type in top_k_pairs:
-                        if "introduced_by_refactorings" in si:
-                            del si["introduced_by_refactorings"]
-                        for ref in si["removed_by_refactorings"]:
-                            ref: dict
-                            for top_k_r in top_k_pairs[si_smell_type]:
-                                if top_k_r==ref["type_name"]:
-                                    removed_by_refactorings = [
-                                        r for r in si["removed_by_refactorings"] if r["type_name"] == top_k_r
-                                    ]
-                                    
-                                    if f"{si_smell_type}_{top_k_r}" not in all_samples:
-                                        all_samples[f"{si_smell_type}_{top_k_r}"] = []
-                                    all_samples[f"{si_smell_type}_{top_k_r}"].append({
-                                        "repo_full_name": repo_full_name,
-                                        "branch": metadata.get("branch", ""),
-                                        "smell_versions": si["smell_versions"],
-                                        "removed_by_refactorings": removed_by_refactorings,
-                                    })
+                si_smell_type = si["smell_versions"][-1]["smell_name"]
+                if si_smell_type in top_k_pairs:
+                    if "introduced_by_refactorings" in si:
+                        del si["introduced_by_refactorings"]
+                    for ref in si["removed_by_refactorings"]:
+                        ref: dict
+                        for top_k_r in top_k_pairs[si_smell_type]:
+                            if top_k_r==ref["type_name"]:
+                                removed_by_refactorings = [
+                                    r for r in si["removed_by_refactorings"] if r["type_name"] == top_k_r
+                                ]
+                                
+                                if f"{si_smell_type}_{top_k_r}" not in all_samples:
+                                    all_samples[f"{si_smell_type}_{top_k_r}"] = []
+                                all_samples[f"{si_smell_type}_{top_k_r}"].append({
+                                    "repo_full_name": repo_full_name,
+                                    "branch": metadata.get("branch", ""),
+                                    "smell_versions": si["smell_versions"],
+                                    "removed_by_refactorings": removed_by_refactorings,
+                                })
         
         return all_samples
         
@@ -201,41 +204,43 @@ class UnmappedSampleGenerator:
 
     def get_all_samples(self):
         all_samples = {}
-        paths = list(FileUtils.traverse_directory(self.lib_dir))
-        for file_path in random.sample(paths, len(paths)):
-            file_path: str
-            if file_path.endswith('.json') and not file_path.endswith('.stats.json') and not file_path.endswith('.chain.json'):
-                repo_full_name = os.path.basename(file_path).replace('.json', '')
-                map_data = FileUtils.load_json_file(file_path)
-                metadata = map_data.get("metadata", {})
-                map_chain_data = FileUtils.load_json_file(file_path.replace('.json', '.chain.json'))
-                smell_instances = map_data.get("smell_instances", [])
+        repo_maps = list_smell_maps(self.lib_dir)
+        for repo_map in random.sample(repo_maps, len(repo_maps)):
+            repo_full_name = repo_map.name
+            metadata = repo_map.metadata
+            map_chain_data = FileUtils.load_json_file(repo_map.chain_path)
+            # only the latest item of each chain is sampled, so keep just those while streaming
+            latest_chain_items = {c.get("chain")[-1] for c in map_chain_data}
+            smell_instances = {
+                idx: si for idx, si in enumerate(repo_map.iter_smell_instances(resolve_refactorings=True))
+                if idx in latest_chain_items
+            }
+            
+            for c in map_chain_data:
+                c: dict
                 
-                for c in map_chain_data:
-                    c: dict
-                    
-                    latest_chain_item = c.get("chain")[-1]
-                    si = self._get_smell_instance(smell_instances, latest_chain_item)
-                    if si["is_alive"]:
-                        continue
-                    
-                    si_smell_type = si["smell_versions"][-1]["smell_name"]
-                    
-                    if si_smell_type in self.smell_types:
-                        if f"{si_smell_type}" not in all_samples:
-                            all_samples[f"{si_smell_type}"] = []
-                        elif len(all_samples[f"{si_smell_type}"]) > 100:
-                            continue
+                latest_chain_item = c.get("chain")[-1]
+                si = self._get_smell_instance(smell_instances, latest_chain_item)
+                if si["is_alive"]:
+                    continue
+                
+                si_smell_type = si["smell_versions"][-1]["smell_name"]
                 
-                        if len(si["removed_by_refactorings"]) == 0 and len(si["introduced_by_refactorings"]) == 0:
-                            all_samples[f"{si_smell_type}"].append({
-                                "repo_full_name": repo_full_name,
-                                "branch": metadata.get("branch", ""),
-                                "smell_versions": si["smell_versions"],
-                                "commit_versions": si["commit_versions"],
-                                "introduced_by_refactorings": si["introduced_by_refactorings"],
-                                "removed_by_refactorings": si["removed_by_refactorings"],
-                            })
+                if si_smell_type in self.smell_types:
+                    if f"{si_smell_type}" not in all_samples:
+                        all_samples[f"{si_smell_type}"] = []
+                    elif len(all_samples[f"{si_smell_type}"]) > 100:
+                        continue
+            
+                    if len(si["removed_by_refactorings"]) == 0 and len(si["introduced_by_refactorings"]) == 0:
+                        all_samples[f"{si_smell_type}"].append({
+                            "repo_full_name": repo_full_name,
+                            "branch": metadata.get("branch", ""),
+                            "smell_versions": si["smell_versions"],
+                            "commit_versions": si["commit_versions"],
+                            "introduced_by_refactorings": si["introduced_by_refactorings"],
+                            "removed_by_refactorings": si["removed_by_refactorings"],
+                        })
         
         return all_samples
 
@@ -0,0 +1,119 @@
+import os
+import sys
+import argparse
+import tracemalloc
+import config
+from data_analyzer import parse_designite_commit
+from models import Smell, SmellInstance, CommitInfo
+from smell_store import SmellStore
+from utils import FileUtils, ColoredStr
+from zip import ZipDataset
+
+class _DictSmell:
+    """
+    Dict-backed Smell layout used before the models were slotted (baseline for the benchmark).
+    """
+    def __init__(self, package_name, smell_kind, smell_name):
+        self.package_name = package_name
+        self.type_name = None
+        self.method_name = None
+        self.method_start_ln = None
+        self.method_end_ln = None
+        self.smell_kind = smell_kind
+        self.smell_name = smell_name
+
+class _DictCommitInfo:
+    def __init__(self, commit_hash, commit_datetime):
+        self.commit_hash = commit_hash
+        self.datetime = commit_datetime
+
+def intern_str(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def load_smell_rows(designite_output_path):
+    """
+    Load every smell row of a Designite output directory or smells archive (the same rows `load_raw_smells` keeps).
+    """
+    rows = []
+    if designite_output_path.endswith('.zip'):
+        with ZipDataset(designite_output_path) as dataset:
+            commit_paths = dataset.list_dirs()
+        zip_path = designite_output_path
+    else:
+        commit_paths = [p for p in FileUtils.traverse_directory(designite_output_path) if not p.endswith('.csv')]
+        zip_path = None
+    for commit_path in commit_paths:
+        _, smell_table, _ = parse_designite_commit(commit_path, zip_path=zip_path)
+        for row in smell_table or []:
+            rows.append(tuple(intern_str(v) for v in row))
+    return rows
+
+def measure(build, rows):
+    """
+    Measure the memory held by the objects `build` creates for the given rows.
+
+    :return: Tuple of (total bytes, bytes per instance).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(row) for row in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    total = after - before - objects.__sizeof__()     # exclude the holding list itself
+    return total, total / max(len(objects), 1)
+
+def build_smell(smell_class):
+    def build(row):
+        smell_kind, package_name, type_name, method_name, method_start_ln, smell_name = row
+        smell = smell_class(package_name, smell_kind, smell_name)
+        smell.type_name = type_name
+        smell.method_name = method_name
+        smell.method_start_ln = method_start_ln
+        return smell
+    return build
+
+def run_benchmark(designite_output_path):
+    rows = load_smell_rows(designite_output_path)
+    print(f"Loaded {len(rows)} smell rows from {designite_output_path}")
+    if not rows:
+        return
+
+    results = {
+        "Smell": (measure(build_smell(_DictSmell), rows), measure(build_smell(Smell), rows)),
+        "CommitInfo": (
+            measure(lambda row: _DictCommitInfo("0" * 40, None), rows),
+            measure(lambda row: CommitInfo("0" * 40, None), rows)
+        ),
+    }
+    for name, ((dict_total, dict_per), (slot_total, slot_per)) in results.items():
+        saving = 1 - slot_per / dict_per if dict_per else 0
+        print(
+            f"{ColoredStr.blue(name)}: dict {dict_per:.1f} B/instance ({dict_total / 2**20:.1f} MiB) | "
+            f"slots {slot_per:.1f} B/instance ({slot_total / 2**20:.1f} MiB) | saving {ColoredStr.green(f'{saving:.1%}')}"
+        )
+
+    # Columnar store used by the lifespan calculation
+    tracemalloc.start()
+    store = SmellStore()
+    for row in rows:
+        store.append(row)
+    store_total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{ColoredStr.blue('SmellStore')}: {store_total / len(rows):.1f} B/row ({store_total / 2**20:.1f} MiB)")
+
+    # SmellInstance only wraps smells that are introduced; report its layout cost for reference
+    _, smell_instance_per = measure(lambda row: SmellInstance(None, None), rows[:10000])
+    print(f"{ColoredStr.blue('SmellInstance')}: slots {smell_instance_per:.1f} B/instance")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-instance memory of the smell models on a repo's Designite output.")
+    parser.add_argument("idx", type=int, nargs="?", help="index of the repository whose smells_<idx>.zip is benchmarked.")
+    parser.add_argument("--path", type=str, help="path to a Designite output directory or smells archive (instead of idx).")
+    args = parser.parse_args()
+
+    if args.path:
+        run_benchmark(args.path)
+    elif args.idx is not None:
+        run_benchmark(os.path.join(config.ZIP_LIB, f'smells_{args.idx}.zip'))
+    else:
+        parser.error("either idx or --path is required")
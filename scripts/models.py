@@ -1,11 +1,15 @@
 from datetime import datetime as dt
-from utils import hashgen
        
 DESIGN_SMELL = "Design"
 IMP_SMELL = "Implementation"
 VALID_SMELL_KINDS = frozenset({DESIGN_SMELL, IMP_SMELL})
     
 class Smell:
+    __slots__ = (
+        "package_name", "type_name", "method_name", "method_start_ln", "method_end_ln",
+        "smell_kind", "smell_name"
+    )
+    
     def __init__(self, package_name, smell_kind, smell_name):
         self._validate_smell_kind(smell_kind)
         
@@ -39,17 +43,6 @@ class Smell:
             # "cause": self.cause
         }
         
-    def hash(self):
-        if self.smell_kind == IMP_SMELL:
-            instance_data = tuple(value for key, value in vars(self).items() if key != 'method_start_ln')
-        else:
-            instance_data = tuple(value for value in vars(self).values())
-        
-        return hashgen(instance_data)
-    
-    def full_hash(self):
-        return hashgen(tuple(vars(self).values()))
-    
     def copy(self):
         new_smell = Smell(
             self.package_name,
@@ -64,6 +57,8 @@ class Smell:
         return new_smell
 
 class CommitInfo:
+    __slots__ = ("commit_hash", "datetime")
+    
     def __init__(self, commit_hash, commit_datetime):
         self.commit_hash: str = commit_hash
         self.datetime: dt = commit_datetime
@@ -75,6 +70,11 @@ class CommitInfo:
         }    
 
 class SmellInstance:
+    __slots__ = (
+        "smell_history", "versions", "is_alive", "commit_span", "days_span",
+        "introduced_by_refactorings", "removed_by_refactorings"
+    )
+    
     def __init__(self, new_smell, initial_commit_info):
         self.smell_history: list[Smell] = [new_smell]
         self.versions: list[CommitInfo] = [initial_commit_info]
@@ -136,11 +136,13 @@ class SmellInstance:
             "is_alive": self.is_alive,
             "commit_span": self.commit_span,
             "days_span": self.days_span,
-            "introduced_by_refactorings": [r.to_dict() for r in self.introduced_by_refactorings],
-            "removed_by_refactorings": [r.to_dict() for r in self.removed_by_refactorings]
+            "introduced_by_refactorings": [r.ref_id for r in self.introduced_by_refactorings],
+            "removed_by_refactorings": [r.ref_id for r in self.removed_by_refactorings]
         }
         
 class _RefactoringChange:
+    __slots__ = ("file_path", "range", "code_element_type", "code_element", "description")
+    
     def __init__(self, file_path, range, code_element_type, code_element, description):
         self.file_path: str = file_path
         self.range: tuple = range
@@ -158,7 +160,13 @@ class _RefactoringChange:
         }
 
 class Refactoring:
-    def __init__(self, url, commit_hash, type_name, description):
+    __slots__ = (
+        "ref_id", "url", "type_name", "description", "commit_hash", "is_mapped_to_introduction",
+        "is_mapped_to_removal", "left_changes", "right_changes"
+    )
+    
+    def __init__(self, url, commit_hash, type_name, description, ordinal=0):
+        self.ref_id: str = f"{commit_hash}:{ordinal}"   # stable id: position in the commit's RefMiner output
         self.url: str = url
         self.type_name: str = type_name
         self.description: str = description
@@ -176,6 +184,7 @@ class Refactoring:
         
     def to_dict(self):
         return {
+            "id": self.ref_id,
             "url": self.url,
             "type_name": self.type_name,
             "is_mapped_to_introduction": self.is_mapped_to_introduction,
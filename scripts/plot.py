@@ -6,6 +6,8 @@ from lifelines import KaplanMeierFitter
 from collections import defaultdict, Counter
 import config
 from utils import FileUtils
+from timeline import CommitTimeline
+from smell_map import list_smell_maps
 from matplotlib.ticker import FixedLocator, FuncFormatter
 
 def no_removal_refs():
@@ -85,16 +87,13 @@ def unmapped_refactorings():
     table_plot_path = os.path.join(config.PLOTS_PATH)
     
     maps_path = os.path.join(config.SMELL_REF_MAP_PATH)
-    for f in FileUtils.traverse_directory(maps_path):
-        if f.endswith('.json') and not f.endswith('.stats.json') and not f.endswith('.chain.json'):
-            data = FileUtils.load_json_file(f)
-            unmapped_refactorings = data.get('unmapped_refactorings', [])
-            for r in unmapped_refactorings:
-                r_type = r.get('type_name')
-                if r_type not in table:
-                    table[r_type] = 1
-                else:
-                    table[r_type] += 1
+    for repo_map in list_smell_maps(maps_path):
+        for r in repo_map.iter_unmapped_refactorings():
+            r_type = r.get('type_name')
+            if r_type not in table:
+                table[r_type] = 1
+            else:
+                table[r_type] += 1
     
     # Calculate total unmapped refactorings
     total_unmapped = sum(table.values())
@@ -130,8 +129,8 @@ def survival_analysis():
     # Load corpus commits mapping
     corpus_commits = FileUtils.load_json_file(os.path.join(config.BIN_PATH, 'data', 'corpus_commits.json'))
     
-    corpus_commits_idx = {
-        repo: {commit_hash: i for i, (commit_hash, _) in enumerate(commits)}
+    corpus_timelines = {
+        repo: CommitTimeline.from_serializable(commits)
         for repo, commits in corpus_commits.items()
     }
 
@@ -140,16 +139,15 @@ def survival_analysis():
         repo = row["repo_name"]
         introduced = row["introduced_commit_hash"]
         removed = row["removed_commit_hash"]
-        commit_idx_map = corpus_commits_idx.get(repo, {})
-        try:
-            start_idx = commit_idx_map[introduced]
-            if pd.isna(removed) or removed not in commit_idx_map:
-                end_idx = max(commit_idx_map.values())  # assume still alive
-            else:
-                end_idx = commit_idx_map[removed]
-            return end_idx - start_idx
-        except KeyError:
+        timeline = corpus_timelines.get(repo)
+        start_idx = timeline.index(introduced) if timeline else None
+        if start_idx is None:
             return None  # one of the hashes not found
+        if pd.isna(removed) or removed not in timeline:
+            end_idx = timeline.last_index()  # assume still alive
+        else:
+            end_idx = timeline.index(removed)
+        return end_idx - start_idx
 
     # Use all rows and determine event observed
     df["event_observed"] = df["is_alive"].apply(lambda alive: 0 if alive else 1)
@@ -381,13 +379,13 @@ def time_series_plot_aggregated():
     repo_count = 0
 
     for repo in repos:
-        repo_all_commits = corpus_commits.get(repo, [])
-        total_commits = len(repo_all_commits)
+        timeline = CommitTimeline.from_serializable(corpus_commits.get(repo, []))
+        total_commits = len(timeline)
         if total_commits < 2:
             continue  # Skip short histories
 
         repo_df: pd.DataFrame = df[df['repo_name'] == repo]
-        commit_hash_to_index = {commit_hash: idx for idx, (commit_hash, _) in enumerate(repo_all_commits)}
+        commit_hash_to_index = timeline.order
 
         introduced_smells = defaultdict(int)
         removed_smells = defaultdict(int)
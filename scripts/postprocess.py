@@ -2,6 +2,7 @@ import os
 import time
 import config
 from utils import FileUtils, hashgen
+from smell_map import SmellMapReader, list_smell_maps
 
 class CorpusAnalyzer:
     def __init__(self):
@@ -15,16 +16,14 @@ class CorpusAnalyzer:
         
     def process_corpus(self):
         # limit = 0
-        for map_file_path in FileUtils.traverse_directory(self.lib_dir):
-            map_file_path: str
+        for repo_map in list_smell_maps(self.lib_dir):
             # if limit == 1:
             #     break
-            if map_file_path.endswith('.json') and not map_file_path.endswith('.stats.json') and not map_file_path.endswith('.chain.json'):
-                print(f"Processing {map_file_path}")
-                self.process_repo(map_file_path, print_log=True)  
-                print(f"Processed {self.maps_finsihed}/{self.TOTAL_MAPS} | {map_file_path}\n")
-                self.maps_finsihed += 1
-                # limit += 1
+            print(f"Processing {repo_map.path}")
+            self.process_repo(repo_map, print_log=True)  
+            print(f"Processed {self.maps_finsihed}/{self.TOTAL_MAPS} | {repo_map.path}\n")
+            self.maps_finsihed += 1
+            # limit += 1
                 
                 
         print(f"Total smell instances: {self.total_smells}")
@@ -32,11 +31,9 @@ class CorpusAnalyzer:
         print(f"Total alive smells: {self.alive_smells}")
         print(f"Total removed smells: {self.removed_smells}")
     
-    def process_repo(self, repo_map_path, print_log=False):
-        repo_full_name = os.path.basename(repo_map_path).replace('.json', '')
-        map_data = FileUtils.load_json_file(repo_map_path)
-        smell_instances: list[dict] = map_data.get("smell_instances", [])
-        smell_instances = self.transform_refs_to_hash(smell_instances)
+    def process_repo(self, repo_map: SmellMapReader, print_log=False):
+        repo_full_name = repo_map.name
+        smell_instances: list[dict] = list(self.summarize_smell_instances(repo_map.iter_smell_instances()))
         
         chain_data = {}
         smell_space = list(range(0, len(smell_instances)))
@@ -145,23 +142,25 @@ class CorpusAnalyzer:
         
         return commit_versions[0]["commit_hash"]
     
-    def transform_refs_to_hash(self, smell_instances):
+    def summarize_smell_instances(self, smell_instances):
+        """
+        Reduce each streamed smell instance to the fields the chains are built from: its last smell
+        version, first and last commit versions, status and refactorings as comparable keys.
+        Refactorings are already referred to by id in normalized maps; inlined ones (older maps) are hashed.
+        """
         for smell_inst in smell_instances:
-            introduced_by_refs = smell_inst["introduced_by_refactorings"]
-            hashed_introduced_by_refs = []
-            for ref in introduced_by_refs:
-                ref_hash = hashgen(ref)
-                hashed_introduced_by_refs.append(ref_hash)
-            smell_inst["introduced_by_refactorings"] = hashed_introduced_by_refs  
-            
-            removed_by_refs = smell_inst["removed_by_refactorings"]
-            hashed_removed_by_refs = []
-            for ref in removed_by_refs:
-                ref_hash = hashgen(ref)
-                hashed_removed_by_refs.append(ref_hash)
-            
-            smell_inst["removed_by_refactorings"] = hashed_removed_by_refs
-        return smell_instances
+            commit_versions = smell_inst["commit_versions"]
+            yield {
+                "smell_versions": smell_inst["smell_versions"][-1:],
+                "commit_versions": [commit_versions[0], commit_versions[-1]],
+                "is_alive": smell_inst.get("is_alive"),
+                "introduced_by_refactorings": [
+                    ref if isinstance(ref, str) else hashgen(ref) for ref in smell_inst["introduced_by_refactorings"]
+                ],
+                "removed_by_refactorings": [
+                    ref if isinstance(ref, str) else hashgen(ref) for ref in smell_inst["removed_by_refactorings"]
+                ],
+            }
     
     def _get_removed_commit_hash(self, smell_instance):
         commit_versions = smell_instance["commit_versions"]
@@ -1,13 +1,39 @@
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
+import threading
+import shutil
+import json
 import os
 import sys
 import config
-from utils import log_execution, ColoredStr
+from utils import log_execution, ColoredStr, GitManager
+
+def split_contiguous(items: list, parts: int) -> list[list]:
+    """
+    Split a list into at most `parts` contiguous, non-empty chunks of near-equal size.
+    """
+    parts = max(1, min(parts, len(items)))
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+def drain_stream(stream, echo=True):
+    """
+    Read a process pipe to EOF, echoing each line (meant to run on its own thread).
+    """
+    for line in stream:
+        if echo: print(line, end="")
+    stream.close()
 
 class Designite:
     jar_path = os.path.join(config.EXECUTABLES_PATH, "DesigniteJava.jar")
     output_dir = os.path.join(config.OUTPUT_PATH, "Designite_OP")
+    ALIAS_FILE = "AliasOf.txt"     # written instead of the output of a commit whose Java sources are unchanged
 
     def __init__(self, print_log = False) -> None:
         self.logs = print_log
@@ -15,7 +41,14 @@ class Designite:
             os.makedirs(self.output_dir)
         
     @log_execution
-    def analyze_commits(self, username: str, repo_name: str, repo_path: Path, branch: str):
+    def analyze_commits(self, username: str, repo_name: str, repo_path: Path, branch: str, on_commit=None):
+        """
+        Analyze every commit of a branch with a single `-aco` Designite run.
+
+        :param on_commit: Called with each commit output directory once Designite exited successfully.
+            `-aco` gives no signal when a commit directory is complete, so none is reported while it runs.
+        :return: The return code of Designite.
+        """
         try:
             print(f"\nRepo: {ColoredStr.blue(repo_path)} | Branch: {ColoredStr.green(branch)}")
             branch_ref = branch if branch in ["master", "main"] else "refs/heads/" + branch
@@ -30,18 +63,146 @@ class Designite:
                 "-aco", branch_ref
             ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
             
-            # Stream the output line by line
-            for line in process.stdout:
-                if self.logs: print(line, end="")  # Output JAR stdout in real-time
-            for line in process.stderr:
-                print(line, end="")  # Output JAR stderr in real-time
+            # Drain both pipes concurrently, so a full stderr buffer never stalls the JVM
+            drainers = [
+                threading.Thread(target=drain_stream, args=(process.stdout, self.logs), daemon=True),
+                threading.Thread(target=drain_stream, args=(process.stderr, True), daemon=True)
+            ]
+            for drainer in drainers:
+                drainer.start()
             process.wait()
+            for drainer in drainers:
+                drainer.join()
+            if on_commit and process.returncode == 0:
+                for entry in sorted(os.scandir(output_path), key=lambda entry: entry.name):
+                    if entry.is_dir():
+                        on_commit(entry.path)
             if process.returncode != 0:
                 print(ColoredStr.red(f"Process failed with return code: {process.returncode}"))
             return process.returncode
         except Exception as e:
             print(ColoredStr.red(f"An error occurred: {e}"))
             return -1
+
+    @log_execution
+    def analyze_commits_sharded(self, username: str, repo_name: str, repo_path: Path, branch: str, shards: int, commits: list[str] = None, on_commit=None):
+        """
+        Analyze the history of a branch with `shards` concurrent Designite JVMs.
+        The commit list is split into contiguous ranges; each range is checked out commit by commit in
+        its own detached git worktree and analyzed into a staging directory, which is moved to
+        `<output>/<commit>` once complete (the layout `-aco` produces). Commits already present in the
+        output are skipped, so an interrupted run can be restarted.
+        With `config.DESIGNITE_SKIP_UNCHANGED_JAVA`, commits whose Java sources are identical to the
+        previous commit's are not analyzed; their directory only holds an alias (see `find_java_aliases`).
+
+        :param commits: Commits to analyze, in timeline order (default: the whole branch history).
+        :param on_commit: Called with each analyzed commit output directory once it is in place (from the shard threads).
+        :return: 0 if every commit was analyzed, otherwise the number of failed commits.
+        """
+        print(f"\nRepo: {ColoredStr.blue(repo_path)} | Branch: {ColoredStr.green(branch)} | Shards: {shards}")
+        output_path = os.path.join(self.output_dir, username, repo_name)
+        os.makedirs(output_path, exist_ok=True)
+
+        if commits is None:
+            commits = GitManager.get_commit_log(repo_path, branch).hashes
+        analyzed_commits = commits
+        if config.DESIGNITE_SKIP_UNCHANGED_JAVA:
+            aliases = self.find_java_aliases(repo_path, commits)
+            for commit_hash, target in aliases.items():
+                self._write_alias(os.path.join(output_path, commit_hash), target)
+            analyzed_commits = [commit_hash for commit_hash in commits if commit_hash not in aliases]
+            print(f"Skipping {len(aliases)} of {len(commits)} commits without Java changes")
+        commit_ranges = split_contiguous(analyzed_commits, shards)
+        worktrees_path = os.path.join(config.WORKTREES_PATH, username, repo_name)
+        os.makedirs(worktrees_path, exist_ok=True)
+        try:
+            with ThreadPoolExecutor(max_workers=max(len(commit_ranges), 1)) as executor:
+                futures = [
+                    executor.submit(self._analyze_commit_range, repo_path, os.path.join(worktrees_path, f"shard_{i}"), commit_range, output_path, on_commit)
+                    for i, commit_range in enumerate(commit_ranges)
+                ]
+                failed = sum(future.result() for future in futures)
+        finally:
+            subprocess.run(["git", "-C", repo_path, "worktree", "prune"], capture_output=True)
+            shutil.rmtree(worktrees_path, ignore_errors=True)
+
+        if failed:
+            print(ColoredStr.red(f"Designite failed on {failed} of {len(analyzed_commits)} commits"))
+        return failed
+
+    @staticmethod
+    def find_java_aliases(repo_path, commits: list[str]) -> dict[str, str]:
+        """
+        Find the commits whose Java sources are identical to those of the commit before them (docs-only,
+        build-file and most merge commits), using the tree SHAs of the Java subtrees.
+
+        :param commits: Commits in timeline order.
+        :return: Alias commit -> the last commit before it that has to be analyzed (same Java sources).
+        """
+        session = GitManager.open_session(repo_path)
+        aliases = {}
+        prev_fingerprint, target = None, None
+        try:
+            for commit_hash in commits:
+                fingerprint = session.java_fingerprint(commit_hash)
+                if target is not None and fingerprint == prev_fingerprint:
+                    aliases[commit_hash] = target
+                else:
+                    target = commit_hash
+                prev_fingerprint = fingerprint
+        finally:
+            GitManager.close_session(repo_path)
+        return aliases
+
+    def _write_alias(self, commit_output_path, target):
+        if os.path.isdir(commit_output_path) and os.listdir(commit_output_path):
+            return
+        os.makedirs(commit_output_path, exist_ok=True)
+        with open(os.path.join(commit_output_path, self.ALIAS_FILE), "w") as file:
+            file.write(target)
+
+    def _analyze_commit_range(self, repo_path, worktree_path, commits: list[str], output_path, on_commit=None) -> int:
+        """
+        Analyze a contiguous range of commits in a dedicated worktree, one Designite run per commit.
+
+        :return: Number of commits that failed.
+        """
+        if os.path.exists(worktree_path):   # left over by an interrupted run
+            subprocess.run(["git", "-C", repo_path, "worktree", "remove", "--force", worktree_path], capture_output=True)
+            shutil.rmtree(worktree_path, ignore_errors=True)
+        subprocess.run(["git", "-C", repo_path, "worktree", "add", "--detach", worktree_path, commits[0]], capture_output=True, check=True)
+        staging_path = f"{worktree_path}.out"
+
+        failed = 0
+        try:
+            for commit_hash in commits:
+                commit_output_path = os.path.join(output_path, commit_hash)
+                if os.path.isdir(commit_output_path):
+                    continue
+                subprocess.run(["git", "-C", worktree_path, "checkout", "--quiet", "--force", "--detach", commit_hash], capture_output=True, check=True)
+                shutil.rmtree(staging_path, ignore_errors=True)
+
+                result = subprocess.run([
+                    "java", "-jar", self.jar_path,
+                    "-i", worktree_path,
+                    "-o", staging_path
+                ], capture_output=True, text=True)
+                if self.logs: print(result.stdout, end="")
+                if result.returncode != 0:
+                    print(ColoredStr.red(f"Designite failed on commit {commit_hash} with return code: {result.returncode}"))
+                    print(result.stderr, end="")
+                    failed += 1
+                    continue
+
+                if os.path.isdir(staging_path):
+                    shutil.move(staging_path, commit_output_path)
+                    if on_commit: on_commit(commit_output_path)
+                else:   # nothing to analyze in this commit
+                    os.makedirs(commit_output_path, exist_ok=True)
+        finally:
+            subprocess.run(["git", "-C", repo_path, "worktree", "remove", "--force", worktree_path], capture_output=True)
+            shutil.rmtree(staging_path, ignore_errors=True)
+        return failed
             
     def save_info(self, repo_path: Path, branch: str, success: bool):
         info_file = os.path.join(self.output_dir, "designite_info.txt")
@@ -103,6 +264,95 @@ class RefMiner:
                 
         except Exception as e:
             print(ColoredStr.red(f"An error occurred: {e}"))
+
+    @log_execution
+    def analyze_windows(self, username: str, repo_name: str, repo_path: Path, branch: str, workers: int, since: str = None):
+        """
+        Analyze the history of a branch with a pool of concurrent RefactoringMiner JVMs.
+        The first-parent chain is split into windows; each window is mined with the between-commits
+        mode (`-bc <start> <end>`, start exclusive), so the windows cover the whole branch without overlap.
+        Window results are kept next to the output until every window succeeded, then merged into a single
+        `{"commits": [...]}` file with the same schema as `-a`. Windows that already have a result are not
+        mined again, so a failed run can be retried without redoing the others.
+
+        :param since: Only mine the commits after this first-parent chain commit (e.g. the head of a previous run).
+        :return: 0 if every window was mined, otherwise the number of failed windows.
+        """
+        print(f"\nRepo: {ColoredStr.blue(repo_path)} | Branch: {ColoredStr.green(branch)} | Workers: {workers}")
+        user_output_path = os.path.join(self.output_dir, username)
+        os.makedirs(user_output_path, exist_ok=True)
+        output_path = os.path.join(user_output_path, f"{repo_name}.json")
+        windows_path = os.path.join(self.output_dir, ".windows", username, repo_name)
+        os.makedirs(windows_path, exist_ok=True)
+
+        chain = GitManager.get_first_parent_chain(repo_path, branch)
+        if not chain:
+            return 1
+        if since is not None:
+            chain = chain[chain.index(since):]
+        # window i covers the commits reachable from its last chain commit but not from the previous window's
+        windows = split_contiguous(chain, workers * config.REFMINER_WINDOWS_PER_WORKER)
+        bounds = [(windows[i - 1][-1] if i else chain[0], window[-1]) for i, window in enumerate(windows)]
+        window_paths = [os.path.join(windows_path, f"{i:04d}_{start[:8]}_{end[:8]}.json") for i, (start, end) in enumerate(bounds)]
+
+        pending = [i for i, window_path in enumerate(window_paths) if not os.path.exists(window_path)]
+        for attempt in range(1 + config.REFMINER_WINDOW_RETRIES):
+            if not pending:
+                break
+            if attempt:
+                print(ColoredStr.orange(f"Retrying {len(pending)} failed window(s) (attempt {attempt + 1})"))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                succeeded = list(executor.map(lambda i: self._analyze_window(repo_path, *bounds[i], window_paths[i]), pending))
+            pending = [i for i, ok in zip(pending, succeeded) if not ok]
+
+        if pending:
+            print(ColoredStr.red(f"RefactoringMiner failed on {len(pending)} of {len(windows)} windows, kept completed windows in {windows_path}"))
+            return len(pending)
+
+        commits, seen = [], set()
+        for window_path in window_paths:
+            with open(window_path, "r") as file:
+                for commit in json.load(file).get("commits", []):
+                    if commit["sha1"] not in seen:
+                        seen.add(commit["sha1"])
+                        commits.append(commit)
+        with open(output_path, "w") as file:
+            json.dump({"commits": commits}, file)
+        shutil.rmtree(windows_path, ignore_errors=True)
+        return 0
+
+    def _analyze_window(self, repo_path, start_commit, end_commit, window_path) -> bool:
+        """
+        Mine the refactorings between two commits into a window result file.
+        The file is written under a temporary name and only renamed once the JSON is complete.
+        """
+        tmp_path = f"{window_path}.tmp"
+        if start_commit == end_commit:     # empty range
+            with open(window_path, "w") as file:
+                json.dump({"commits": []}, file)
+            return True
+        try:
+            result = subprocess.run([
+                "sh", "RefactoringMiner",
+                "-bc", repo_path, start_commit, end_commit,
+                "-json", tmp_path
+            ], capture_output=True, text=True, cwd=self.bin_path, shell=sys.platform != 'linux')
+            if self.logs:
+                print(result.stdout, end="")
+            if result.returncode != 0:
+                print(ColoredStr.red(f"RefactoringMiner failed on {start_commit[:8]}..{end_commit[:8]} with return code: {result.returncode}"))
+                print(result.stderr, end="")
+                return False
+            with open(tmp_path, "r") as file:
+                json.load(file)     # an unreadable result counts as a failure
+            os.replace(tmp_path, window_path)
+            return True
+        except Exception as e:
+            print(ColoredStr.red(f"An error occurred during analysis of {start_commit[:8]}..{end_commit[:8]}: {e}"))
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 # class PyDriller:
     
 #     @staticmethod
@@ -0,0 +1,178 @@
+import os
+import re
+import json
+from utils import FileUtils
+
+# `<repo>@<user>.ndjson`, or `<repo>@<user>.<shard>.ndjson` when sharded
+MAP_FILE_REGEX = re.compile(r"^(?P<name>.+?)(?:\.(?P<shard>\d{4}))?\.ndjson$")
+LEGACY_EXCLUDED_SUFFIXES = ('.stats.json', '.chain.json')
+
+METADATA = "metadata"
+REFACTORING = "refactoring"
+SMELL_INSTANCE = "smell_instance"
+UNMAPPED_REFACTORING = "unmapped_refactoring"
+
+class SmellMapWriter:
+    """
+    Streaming writer of a repo smell map. Each record is written as one JSON line
+    (`{"record": <type>, "data": {...}}`) as soon as it is produced, so the map is never
+    held in memory as a whole. With a shard size, a new file is started every `shard_size` records.
+    Records are written in the order metadata, refactorings, smell instances, unmapped refactorings;
+    smell instances and unmapped refactorings refer to refactorings by their id.
+    """
+    def __init__(self, map_dir, repo_full_name, shard_size: int = None):
+        self.map_dir = map_dir
+        self.repo_full_name = repo_full_name
+        self.shard_size = shard_size
+        self.records = 0
+        self.paths: list[str] = []
+        self._file = None
+        os.makedirs(map_dir, exist_ok=True)
+        for stale_path in map_file_paths(map_dir, repo_full_name):     # left over by a previous run
+            os.remove(stale_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _next_file(self):
+        if self._file is not None:
+            self._file.close()
+        if self.shard_size:
+            file_name = f"{self.repo_full_name}.{len(self.paths):04d}.ndjson"
+        else:
+            file_name = f"{self.repo_full_name}.ndjson"
+        self.paths.append(os.path.join(self.map_dir, file_name))
+        self._file = open(self.paths[-1], 'w')
+
+    def write(self, record_type, data: dict):
+        if self._file is None or (self.shard_size and self.records and self.records % self.shard_size == 0):
+            self._next_file()
+        self._file.write(json.dumps({"record": record_type, "data": data}) + "\n")
+        self.records += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def map_file_paths(map_dir, repo_full_name) -> list[str]:
+    """
+    Get the NDJSON file(s) of a repo smell map, in shard order.
+    """
+    if not os.path.isdir(map_dir):
+        return []
+    paths = []
+    for file_name in os.listdir(map_dir):
+        match = MAP_FILE_REGEX.match(file_name)
+        if match and match.group("name") == repo_full_name:
+            paths.append(os.path.join(map_dir, file_name))
+    return sorted(paths)
+
+class SmellMapReader:
+    """
+    Streaming reader of a repo smell map written by SmellMapWriter. Maps saved as a
+    single JSON document (`<repo>@<user>.json`) by earlier versions are read as well.
+    """
+    def __init__(self, map_dir, repo_full_name):
+        self.map_dir = map_dir
+        self.name = repo_full_name
+        self.paths = map_file_paths(map_dir, repo_full_name)
+        self.legacy_path = None if self.paths else os.path.join(map_dir, f"{repo_full_name}.json")
+        self._metadata = None
+        self._refactorings = None
+
+    @property
+    def path(self):
+        return self.paths[0] if self.paths else self.legacy_path
+
+    @property
+    def chain_path(self):
+        return os.path.join(self.map_dir, f"{self.name}.chain.json")
+
+    @property
+    def stats_path(self):
+        return os.path.join(self.map_dir, f"{self.name}.stats.json")
+
+    def iter_records(self, record_type=None):
+        """
+        Stream the records of the map.
+
+        :param record_type: Only yield records of this type.
+        :yield: Tuples of (record type, data).
+        """
+        if self.legacy_path:
+            map_data = FileUtils.load_json_file(self.legacy_path)
+            records = [(METADATA, map_data.get("metadata", {}))]
+            records += [(SMELL_INSTANCE, si) for si in map_data.get("smell_instances", [])]
+            records += [(UNMAPPED_REFACTORING, ref) for ref in map_data.get("unmapped_refactorings", [])]
+            for record, data in records:
+                if record_type is None or record == record_type:
+                    yield record, data
+            return
+
+        for path in self.paths:
+            with open(path, 'r') as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record_type is None or record["record"] == record_type:
+                        yield record["record"], record["data"]
+
+    @property
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            self._metadata = next((data for _, data in self.iter_records(METADATA)), {})
+        return self._metadata
+
+    def refactorings(self) -> dict[str, dict]:
+        """
+        Get the refactoring table of the map (refactoring id -> refactoring).
+        """
+        if self._refactorings is None:
+            self._refactorings = {}
+            for record, data in self.iter_records():
+                if record == REFACTORING:
+                    self._refactorings[data["id"]] = data
+                elif record != METADATA:    # the table precedes all other records
+                    break
+        return self._refactorings
+
+    def _resolve(self, refs: list) -> list[dict]:
+        table = self.refactorings()
+        return [table[ref] if isinstance(ref, str) else ref for ref in refs]
+
+    def iter_smell_instances(self, resolve_refactorings=False):
+        """
+        Stream the smell instances of the map.
+
+        :param resolve_refactorings: Replace the refactoring ids of each smell instance by the
+            refactorings themselves (shared dicts from the refactoring table).
+        """
+        for _, data in self.iter_records(SMELL_INSTANCE):
+            if resolve_refactorings:
+                data["introduced_by_refactorings"] = self._resolve(data["introduced_by_refactorings"])
+                data["removed_by_refactorings"] = self._resolve(data["removed_by_refactorings"])
+            yield data
+
+    def iter_unmapped_refactorings(self):
+        for _, data in self.iter_records(UNMAPPED_REFACTORING):
+            yield self.refactorings()[data["id"]] if "id" in data and len(data) == 1 else data
+
+def list_smell_maps(map_dir) -> list[SmellMapReader]:
+    """
+    Get a reader for every repo smell map of a directory (sharded, single-file or legacy JSON).
+    """
+    if not os.path.isdir(map_dir):
+        return []
+    names = {}
+    for file_name in sorted(os.listdir(map_dir)):
+        match = MAP_FILE_REGEX.match(file_name)
+        if match:
+            names[match.group("name")] = None
+        elif file_name.endswith('.json') and not file_name.endswith(LEGACY_EXCLUDED_SUFFIXES):
+            names[file_name[:-len('.json')]] = None
+    return [SmellMapReader(map_dir, name) for name in names]
@@ -0,0 +1,273 @@
+import os
+import json
+from array import array
+import numpy as np
+from models import Smell, IMP_SMELL, DESIGN_SMELL
+
+NO_LINE = -1    # encodes a missing method start line
+
+class CategoryCodes:
+    """
+    Categorical code table: maps each distinct value to a dense integer code.
+    """
+    def __init__(self):
+        self.codes: dict = {}
+        self.values: list = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+class CommitSmells:
+    """
+    Snapshot of the unique smell identities of one commit, in order of first occurrence.
+    Like a dict keyed by smell identity, each identity points to its last row in the smell table.
+    """
+    def __init__(self, ids: np.ndarray, table_rows: np.ndarray, kinds: np.ndarray, start_lns: np.ndarray):
+        self.ids = ids                  # identity ids, first-occurrence order
+        self.table_rows = table_rows    # index of the last occurrence in the smell table
+        self.kinds = kinds
+        self.start_lns = start_lns
+        self.order = np.argsort(ids, kind="stable")
+        self.sorted_ids = ids[self.order]
+
+    def __len__(self):
+        return len(self.ids)
+
+class SmellStore:
+    """
+    Columnar store of smells. Package, type, method and smell names are integer-coded, and
+    every smell identity (all fields, without the start line for implementation smells) gets
+    an integer id, so commit snapshots can be compared with vectorized set operations instead
+    of per-commit Python dicts.
+    """
+    KINDS = (DESIGN_SMELL, IMP_SMELL)
+
+    def __init__(self):
+        self.packages = CategoryCodes()
+        self.types = CategoryCodes()
+        self.methods = CategoryCodes()
+        self.smell_names = CategoryCodes()
+        self.identities = CategoryCodes()       # identity code tuple -> identity id
+
+        self._kind = array('b')
+        self._package = array('i')
+        self._type = array('i')
+        self._method = array('i')
+        self._smell_name = array('i')
+        self._start_ln = array('i')
+        self._identity = array('q')
+
+    def __len__(self):
+        return len(self._identity)
+
+    def _encode(self, smell_row: tuple) -> tuple:
+        smell_kind, package_name, type_name, method_name, method_start_ln, smell_name = smell_row
+        kind = self.KINDS.index(smell_kind)
+        package = self.packages.encode(package_name)
+        type_code = self.types.encode(type_name)
+        method = self.methods.encode(method_name)
+        name = self.smell_names.encode(smell_name)
+        start_ln = NO_LINE if method_start_ln is None else method_start_ln
+        # Implementation smells are tracked regardless of their start line
+        identity = (kind, package, type_code, method, name) if smell_kind == IMP_SMELL else (kind, package, type_code, method, name, start_ln)
+        return kind, package, type_code, method, name, start_ln, self.identities.encode(identity)
+
+    def snapshot(self, smell_table: list[tuple]) -> CommitSmells:
+        """
+        Encode the smell table of a commit into a snapshot. Rows are not stored.
+
+        :param smell_table: Rows of (smell_kind, package_name, type_name, method_name, method_start_ln, smell_name).
+        """
+        if not smell_table:
+            empty = np.zeros(0, np.int64)
+            return CommitSmells(empty, empty, empty, empty)
+
+        encoded = np.array([self._encode(row) for row in smell_table], dtype=np.int64)
+        ids = encoded[:, 6]
+        _, first_idx = np.unique(ids, return_index=True)
+        _, last_idx_reversed = np.unique(ids[::-1], return_index=True)
+        last_idx = len(ids) - 1 - last_idx_reversed      # aligned with first_idx (both sorted by id)
+        order = np.argsort(first_idx, kind="stable")
+        table_rows = last_idx[order]
+        return CommitSmells(ids[first_idx[order]], table_rows, encoded[table_rows, 0], encoded[table_rows, 5])
+
+    def diff(self, prev: CommitSmells, curr: CommitSmells):
+        """
+        Compare two snapshots with sorted-key merges.
+
+        :return: Tuple of (added positions in curr, removed positions in prev, moved positions in curr).
+            Added and removed positions keep first-occurrence order; moved positions are Implementation
+            smells whose method start line changed.
+        """
+        added = np.flatnonzero(~np.isin(curr.ids, prev.sorted_ids, assume_unique=True))
+        removed = np.flatnonzero(~np.isin(prev.ids, curr.sorted_ids, assume_unique=True))
+
+        _, prev_idx, curr_idx = np.intersect1d(prev.sorted_ids, curr.sorted_ids, assume_unique=True, return_indices=True)
+        prev_pos = prev.order[prev_idx]
+        curr_pos = curr.order[curr_idx]
+        imp_kind = self.KINDS.index(IMP_SMELL)
+        moved_mask = (curr.kinds[curr_pos] == imp_kind) & (prev.start_lns[prev_pos] != curr.start_lns[curr_pos])
+        return added, removed, np.sort(curr_pos[moved_mask])
+
+    def append(self, smell_row: tuple) -> int:
+        """
+        Store a smell row and return its row number.
+        """
+        kind, package, type_code, method, name, start_ln, identity = self._encode(smell_row)
+        self._kind.append(kind)
+        self._package.append(package)
+        self._type.append(type_code)
+        self._method.append(method)
+        self._smell_name.append(name)
+        self._start_ln.append(start_ln)
+        self._identity.append(identity)
+        return len(self) - 1
+
+    def identity(self, row) -> int:
+        return self._identity[row]
+
+    def start_ln(self, row):
+        start_ln = self._start_ln[row]
+        return None if start_ln == NO_LINE else start_ln
+
+    def smell(self, row) -> Smell:
+        """
+        Materialise a Smell object for a row.
+        """
+        smell = Smell(self.packages.decode(self._package[row]), self.KINDS[self._kind[row]], self.smell_names.decode(self._smell_name[row]))
+        smell.type_name = self.types.decode(self._type[row])
+        smell.method_name = self.methods.decode(self._method[row])
+        smell.method_start_ln = self.start_ln(row)
+        return smell
+
+class SmellEvent:
+    """
+    Smell changes of one commit. Smells are referred to by the store row they were introduced with.
+    """
+    __slots__ = ("commit_hash", "introduced", "removed", "moved")
+
+    def __init__(self, commit_hash, introduced: list[int], removed: list[int], moved: list[tuple[int, int]]):
+        self.commit_hash = commit_hash
+        self.introduced = introduced    # rows of the smells introduced by the commit
+        self.removed = removed          # rows of the smells removed by the commit
+        self.moved = moved              # (row, new method start line) of moved Implementation smells
+
+    def is_empty(self):
+        return not (self.introduced or self.removed or self.moved)
+
+class SmellDeltaEncoder:
+    """
+    Turns per-commit smell snapshots, pushed in timeline order, into a stream of SmellEvents.
+    Only the previous snapshot is kept, and only introduced smells are stored, so memory grows
+    with the number of smell changes rather than commits x smells.
+    """
+    def __init__(self, store: SmellStore):
+        self.store = store
+        self.live_rows: dict[int, int] = {}     # identity id -> row the live smell was introduced with
+        self._prev: CommitSmells = None
+
+    def push(self, commit_hash, smell_table: list[tuple]) -> SmellEvent:
+        """
+        Compare the smells of a commit with those of the previously pushed commit.
+
+        :param smell_table: Smell rows of the commit, or None if it has no smell CSV.
+        :return: The changes introduced by the commit.
+        """
+        curr = self.store.snapshot(smell_table)
+        if self._prev is None:      # first commit, everything is introduced
+            added, removed, moved = np.arange(len(curr)), [], []
+        else:
+            added, removed, moved = self.store.diff(self._prev, curr)
+
+        event = SmellEvent(commit_hash, [], [], [])
+        for pos in moved.tolist() if len(moved) else []:
+            start_ln = int(curr.start_lns[pos])
+            event.moved.append((self.live_rows[int(curr.ids[pos])], None if start_ln == NO_LINE else start_ln))
+        for pos in added.tolist():
+            row = self.store.append(smell_table[curr.table_rows[pos]])
+            self.live_rows[int(curr.ids[pos])] = row
+            event.introduced.append(row)
+        for pos in removed.tolist() if len(removed) else []:
+            row = self.live_rows.pop(int(self._prev.ids[pos]), None)
+            if row is not None:
+                event.removed.append(row)
+
+        self._prev = curr
+        return event
+
+class SmellEventLog:
+    """
+    Ordered smell events of a repository together with the store of the introduced smells.
+    Persisted as JSON lines, one event per line; introduced smells are written in full and
+    referred to by their row (`id`) afterwards.
+    """
+    def __init__(self, store: SmellStore = None):
+        self.store = store if store is not None else SmellStore()
+        self.events: list[SmellEvent] = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def append(self, event: SmellEvent):
+        if not event.is_empty():
+            self.events.append(event)
+
+    def save(self, file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            for event in self.events:
+                introduced = []
+                for row in event.introduced:
+                    smell = self.store.smell(row)
+                    introduced.append({
+                        "id": row,
+                        "smell_kind": smell.smell_kind,
+                        "package_name": smell.package_name,
+                        "type_name": smell.type_name,
+                        "method_name": smell.method_name,
+                        "method_start_ln": smell.method_start_ln,
+                        "smell_name": smell.smell_name
+                    })
+                file.write(json.dumps({
+                    "commit": event.commit_hash,
+                    "introduced": introduced,
+                    "removed": event.removed,
+                    "moved": event.moved
+                }) + "\n")
+
+    @staticmethod
+    def load(file_path) -> "SmellEventLog":
+        """
+        Read an event log written by `save`, rebuilding its store with the same rows.
+        """
+        event_log = SmellEventLog()
+        with open(file_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                introduced = []
+                for smell in data["introduced"]:
+                    row = event_log.store.append((
+                        smell["smell_kind"], smell["package_name"], smell["type_name"],
+                        smell["method_name"], smell["method_start_ln"], smell["smell_name"]
+                    ))
+                    if row != smell["id"]:
+                        raise ValueError(f"Corrupted smell event log {file_path}: expected smell id {row}, got {smell['id']}")
+                    introduced.append(row)
+                event_log.events.append(SmellEvent(data["commit"], introduced, data["removed"], [tuple(m) for m in data["moved"]]))
+        return event_log
@@ -0,0 +1,65 @@
+from datetime import datetime
+from utils import CommitLog
+
+class CommitTimeline:
+    """
+    Ordered commit history with constant-time lookups.
+    Backed by a CommitLog (parallel arrays), a hash -> index dict and a bytearray
+    mask marking the commits that were analyzed (active).
+    """
+    def __init__(self, commit_log: CommitLog):
+        self.log = commit_log
+        self.order: dict[str, int] = {commit_hash: idx for idx, commit_hash in enumerate(commit_log.hashes)}
+        self.active = bytearray(len(commit_log))
+
+    @staticmethod
+    def from_serializable(commits: list) -> "CommitTimeline":
+        """
+        Build a timeline from serialized (commit hash, ISO datetime) pairs, e.g. `repo_commits` of a stats file.
+        """
+        return CommitTimeline(CommitLog.from_serializable(commits))
+
+    def __len__(self):
+        return len(self.log)
+
+    def __contains__(self, commit_hash):
+        return commit_hash in self.order
+
+    def index(self, commit_hash, default=None):
+        """
+        Get the position of a commit in the timeline.
+        """
+        return self.order.get(commit_hash, default)
+
+    def last_index(self):
+        return len(self.log) - 1
+
+    def datetime(self, commit_hash) -> datetime:
+        """
+        Get the commit datetime of a commit, or None if it is not part of the timeline.
+        """
+        idx = self.order.get(commit_hash)
+        return self.log.datetime(idx) if idx is not None else None
+
+    def mark_active(self, commit_hash) -> bool:
+        """
+        Mark a commit as active. Returns False if the commit is not part of the timeline.
+        """
+        idx = self.order.get(commit_hash)
+        if idx is None:
+            return False
+        self.active[idx] = 1
+        return True
+
+    def is_active(self, commit_hash) -> bool:
+        idx = self.order.get(commit_hash)
+        return idx is not None and self.active[idx] == 1
+
+    def active_indices(self) -> list[int]:
+        return [idx for idx, flag in enumerate(self.active) if flag]
+
+    def active_commits(self) -> list[tuple[str, datetime]]:
+        """
+        Get the active commits as (commit hash, commit datetime) pairs in timeline order.
+        """
+        return [(self.log.hashes[idx], self.log.datetime(idx)) for idx in self.active_indices()]
@@ -2,7 +2,7 @@ import os
 import traceback
 from datetime import datetime
 import config
-from utils import FileUtils
+from utils import FileUtils, CommitLog
 
 def collect_repo_hashes():
     data = {}
@@ -20,12 +20,7 @@ def collect_repo_hashes():
             repo_full_name = os.path.basename(f).replace('.stats.json', '')
             sorted_commits: list[tuple[str, datetime]] = map_data.get("repo_commits", [])
             
-            sorted_commits_serializable = [
-                (commit_hash, commit_dt.isoformat() if isinstance(commit_dt, datetime) else commit_dt)
-                for commit_hash, commit_dt in sorted_commits
-            ]
-            
-            data[repo_full_name] = sorted_commits_serializable
+            data[repo_full_name] = CommitLog.from_serializable(sorted_commits).to_serializable()
         except Exception as e:
             print(f"Error processing {f}: {e}")
             traceback.print_exc()
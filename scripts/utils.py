@@ -4,8 +4,15 @@ import json
 import csv
 import traceback
 import hashlib
+import subprocess
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 import chardet
 from git import Repo, NULL_TREE
+from java_parser import JavaSourceRanges
 
 def log_execution(func):
     def wrapper(*args, **kwargs):
@@ -103,6 +110,64 @@ class FileUtils:
             data = {}
         return data
 
+    def iter_json_array(file_path, key, chunk_size=1 << 20):
+        """
+        Stream the items of a top-level JSON array (e.g. `{"commits": [...]}`) one at a time,
+        without loading the whole document. Peak memory is bounded by the largest item.
+
+        :param file_path: Path to the JSON file, or an open text stream (closed after reading).
+        :param key: Name of the top-level key holding the array.
+        :param chunk_size: Number of characters read per step.
+        :yield: The decoded array items. Nothing is yielded if the file or key is not found.
+        """
+        decoder = json.JSONDecoder()
+        key_regex = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        try:
+            file = open(file_path, 'r') if isinstance(file_path, str) else file_path
+        except FileNotFoundError:
+            return
+        
+        with file:
+            buffer = ''
+            eof = False
+            
+            # locate the start of the array
+            while True:
+                match = key_regex.search(buffer)
+                if match:
+                    pos = match.end()
+                    break
+                if eof:
+                    return
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[-len(key) - 16:] + chunk
+            
+            read_size = chunk_size
+            while True:
+                # skip separators between items
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buffer) and buffer[pos] == ']':
+                    return
+                if pos < len(buffer):
+                    try:
+                        item, end = decoder.raw_decode(buffer, pos)
+                        yield item
+                        pos = end
+                        continue
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        read_size *= 2  # item larger than the buffer, read ahead faster
+                elif eof:
+                    raise ValueError(f"Unterminated '{key}' array in {file_path}")
+                
+                chunk = file.read(read_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+
     def save_json_file(file_path, data):
         """
         Save data to a JSON file. If the directory does not exist, create it.
@@ -118,11 +183,11 @@ class FileUtils:
         """
         Load a CSV file and return its contents as a list of dictionaries, skipping specified columns.
 
-        :param file_path: Path to the CSV file.
+        :param file_path: Path to the CSV file, or an open text stream (closed after reading).
         :param skipCols: List of column names to skip.
         :return: List of dictionaries containing the CSV data.
         """
-        with open(file_path, 'r') as file:
+        with (open(file_path, 'r') if isinstance(file_path, str) else file_path) as file:
             reader = csv.DictReader(file)
             data = [{k: v for k, v in row.items() if k not in skipCols} for row in reader]
         return data
@@ -140,8 +205,611 @@ class FileUtils:
             for name in files:
                 yield os.path.join(root, name)
 
+class PathIndex:
+    """
+    Suffix index over the file paths of a repository snapshot (or any list of paths).
+    Paths are bucketed by file name and by parent directory name, so a suffix lookup
+    only tests the few paths sharing the suffix's last component instead of every path.
+    Lookups keep the order of the given paths, i.e. the first match is the same one a
+    linear `endswith` scan would return.
+    """
+    def __init__(self, paths: list[str], shas: list[str] = None):
+        self.paths = paths
+        self.shas = shas
+        self._by_name: dict[str, list[int]] = {}
+        self._by_dir: dict[str, list[int]] = {}
+        for idx, path in enumerate(paths):
+            dir_path, _, name = path.rpartition('/')
+            self._by_name.setdefault(name, []).append(idx)
+            if dir_path:
+                self._by_dir.setdefault(dir_path.rpartition('/')[2], []).append(idx)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def find_all(self, suffix: str) -> list[int]:
+        """
+        Get the indices of all paths ending with the given suffix.
+        """
+        name = suffix.rpartition('/')[2]
+        if '/' not in suffix or not name:
+            return [idx for idx, path in enumerate(self.paths) if path.endswith(suffix)]
+        return [idx for idx in self._by_name.get(name, []) if self.paths[idx].endswith(suffix)]
+
+    def find(self, suffix: str):
+        """
+        Get the index of the first path ending with the given suffix, or None.
+        """
+        matches = self.find_all(suffix)
+        return matches[0] if matches else None
+
+    def match_file(self, smell_file_path: str) -> set[str]:
+        """
+        Get all paths that intersect with a smell file path (see `is_file_match`).
+        """
+        if smell_file_path == "<All packages>":
+            return set(self.paths)
+        matched = {self.paths[idx] for idx in self.find_all(smell_file_path)}
+        name = smell_file_path.rpartition('/')[2]
+        if '/' not in smell_file_path or not name:
+            candidates = range(len(self.paths))
+        else:
+            candidates = self._by_dir.get(name, [])
+        for idx in candidates:
+            if PathIndex.is_file_match(smell_file_path, self.paths[idx]):
+                matched.add(self.paths[idx])
+        return matched
+
+    @staticmethod
+    def is_file_match(smell_file_path: str, target_path: str) -> bool:
+        """
+        Check if the smell file path intersects with the target path.
+        """
+        if smell_file_path == "<All packages>":
+            return True
+        if target_path.endswith(smell_file_path):
+            return True
+        target_pkg_path = '/'.join(target_path.split('/')[:-1])
+        target_extension = target_path.split('.')[-1]
+        if target_pkg_path and target_extension:
+            return target_pkg_path.endswith(smell_file_path) and target_extension == "java"
+        return False
+
+class IntervalIndex:
+    """
+    Static index over closed line intervals, each carrying a value. Intervals are sorted by
+    start with a running maximum of their ends, so a stabbing query bisects both arrays and
+    only scans the intervals between the two bounds.
+    Intervals with a missing bound cannot be stabbed but are still listed by `values`.
+    """
+    def __init__(self, intervals: list[tuple[int, int, object]]):
+        self._values = [value for _, _, value in intervals]
+        bounded = sorted(
+            ((start, end, value) for start, end, value in intervals if start is not None and end is not None),
+            key=lambda interval: interval[0]
+        )
+        self._intervals = bounded
+        self._starts = [start for start, _, _ in bounded]
+        self._max_ends = []
+        max_end = None
+        for _, end, _ in bounded:
+            max_end = end if max_end is None else max(max_end, end)
+            self._max_ends.append(max_end)
+
+    def __len__(self):
+        return len(self._values)
+
+    def values(self) -> list:
+        """
+        Get the values of all intervals, in insertion order.
+        """
+        return self._values
+
+    def stab(self, start, end=None) -> list:
+        """
+        Get the values of the intervals overlapping [start, end], or containing `start` if no end is given.
+        """
+        if start is None:
+            return []
+        if end is None:
+            end = start
+        lo = bisect_left(self._max_ends, start)     # intervals before lo all end before start
+        hi = bisect_right(self._starts, end)        # intervals from hi on all start after end
+        return [value for _, interval_end, value in self._intervals[lo:hi] if interval_end >= start]
+
+class SourceDecoder:
+    """
+    Decodes source file bytes without running chardet on every file.
+    Strict UTF-8 is tried first; otherwise the encoding previously detected for the
+    same path is reused, and only then chardet runs on a prefix of the content.
+    """
+    UTF8_BOM = b"\xef\xbb\xbf"
+
+    def __init__(self, sample_size=64 * 1024):
+        self.sample_size = sample_size      # bytes given to chardet, None for the whole content
+        self._encodings: dict[str, str] = {}
+        self.stats = {"utf8": 0, "cached": 0, "detected": 0}
+
+    def decode(self, file_bytes: bytes, file_path=None):
+        """
+        Decode raw file bytes.
+
+        :param file_bytes: Raw content of a file.
+        :param file_path: Path of the file, used to cache its detected encoding.
+        :return: The decoded text.
+        """
+        try:
+            text = file_bytes.decode("utf-8-sig" if file_bytes.startswith(self.UTF8_BOM) else "utf-8")
+            self.stats["utf8"] += 1
+            return text
+        except UnicodeDecodeError:
+            pass
+
+        encoding = self._encodings.get(file_path)
+        if encoding:
+            try:
+                text = file_bytes.decode(encoding)
+                self.stats["cached"] += 1
+                return text
+            except (UnicodeDecodeError, LookupError):
+                pass
+
+        sample = file_bytes if self.sample_size is None else file_bytes[:self.sample_size]
+        detected = chardet.detect(sample)
+        encoding = detected["encoding"] if detected["encoding"] else "utf-8"
+        self.stats["detected"] += 1
+        if file_path is not None:
+            self._encodings[file_path] = encoding
+        try:
+            return file_bytes.decode(encoding, errors="replace")
+        except LookupError:
+            return file_bytes.decode("utf-8", errors="replace")
+
+    def fallback_ratio(self):
+        """
+        Fraction of decoded files that needed the slow chardet path.
+        """
+        total = sum(self.stats.values())
+        return self.stats["detected"] / total if total else 0.0
+
+class GitSession:
+    """
+    Long-lived handle on a local Git repository.
+
+    Keeps a single `Repo` object, persistent `git cat-file --batch` and
+    `--batch-check` processes, and caches of resolved commits and trees,
+    so helpers called once per commit or per method do not reopen the repository.
+    """
+    COMMIT_LINE_REGEX = re.compile(rb"^[0-9a-f]{40}$")
+    HUNK_HEADER_REGEX = re.compile(rb"@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.repo = Repo(repo_path)
+        self._batch: subprocess.Popen = None
+        self._batch_check: subprocess.Popen = None
+        self._commits = {}
+        self._trees = {}
+        self._path_indexes: OrderedDict[str, PathIndex] = OrderedDict()  # tree sha -> index
+        self._java_fingerprints: dict[str, str] = {}   # tree sha -> fingerprint of its Java files
+        self.decoder = SourceDecoder()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _cat_file(self, mode):
+        return subprocess.Popen(
+            ["git", "-C", self.repo_path, "cat-file", mode],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def commit(self, commit_hash):
+        """
+        Get the (cached) commit object for a commit hash.
+        """
+        commit = self._commits.get(commit_hash)
+        if commit is None:
+            commit = self.repo.commit(commit_hash)
+            self._commits[commit_hash] = commit
+        return commit
+
+    def tree(self, commit_hash):
+        """
+        Get the (cached) root tree object of a commit.
+        """
+        tree = self._trees.get(commit_hash)
+        if tree is None:
+            tree = self.commit(commit_hash).tree
+            self._trees[commit_hash] = tree
+        return tree
+
+    def path_index(self, commit_hash, max_cached=32) -> PathIndex:
+        """
+        Get the path index of a commit's tree. Indexes are built once per tree
+        (one `ls-tree` call) and shared by all commits with an identical tree.
+        Blob paths are ordered shallowest first, matching `Tree.traverse()`.
+
+        :param commit_hash: Hash of the commit.
+        :param max_cached: Number of tree indexes kept in memory.
+        :return: A PathIndex with the blob SHA of every path, or None if the commit is unknown.
+        """
+        tree_info = self.object_info(f"{commit_hash}^{{tree}}")
+        if tree_info is None:
+            return None
+        tree_sha = tree_info[0]
+        index = self._path_indexes.get(tree_sha)
+        if index is not None:
+            self._path_indexes.move_to_end(tree_sha)
+            return index
+
+        output = subprocess.run(
+            ["git", "-C", self.repo_path, "ls-tree", "-r", "-z", "--full-tree", tree_sha],
+            capture_output=True, check=True
+        ).stdout
+        entries = []
+        for entry in output.split(b"\0"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            _, obj_type, sha = meta.split()
+            if obj_type == b"blob":
+                path = path.decode("utf-8", errors="surrogateescape")
+                entries.append((path.count('/'), path, sha.decode()))
+        entries.sort(key=lambda e: e[0])  # stable: breadth-first like Tree.traverse()
+
+        index = PathIndex([e[1] for e in entries], [e[2] for e in entries])
+        self._path_indexes[tree_sha] = index
+        if len(self._path_indexes) > max_cached:
+            self._path_indexes.popitem(last=False)
+        return index
+
+    def java_fingerprint(self, commit_hash):
+        """
+        Fingerprint of the Java sources of a commit: two commits get the same fingerprint exactly
+        when their `.java` files (paths and contents) are identical. It is built bottom-up from the
+        tree objects and memoized per tree SHA, so only the subtrees a commit changed are read.
+
+        :param commit_hash: Hash of the commit.
+        :return: A hex digest, or None if the commit has no Java file.
+        """
+        tree_info = self.object_info(f"{commit_hash}^{{tree}}")
+        if tree_info is None:
+            raise ValueError(f"Unknown commit: {commit_hash}")
+        return self._java_tree_fingerprint(tree_info[0])
+
+    def _java_tree_fingerprint(self, tree_sha):
+        if tree_sha in self._java_fingerprints:
+            return self._java_fingerprints[tree_sha]
+
+        # raw tree entries: `<mode> <name>\0<20-byte sha>`
+        data = self.read_object(tree_sha)
+        sha = hashlib.sha1()
+        has_java = False
+        pos = 0
+        while pos < len(data):
+            space = data.index(b" ", pos)
+            nul = data.index(b"\0", space)
+            mode, name = data[pos:space], data[space + 1:nul]
+            entry_sha = data[nul + 1:nul + 21].hex()
+            pos = nul + 21
+            if mode == b"40000":
+                entry_sha = self._java_tree_fingerprint(entry_sha)
+                if entry_sha is None:
+                    continue
+            elif not name.endswith(b".java") or mode == b"160000":     # skip non-Java files and submodules
+                continue
+            sha.update(name + b"\0" + entry_sha.encode() + b"\n")
+            has_java = True
+
+        fingerprint = sha.hexdigest() if has_java else None
+        self._java_fingerprints[tree_sha] = fingerprint
+        return fingerprint
+
+    def object_info(self, rev):
+        """
+        Resolve a revision (e.g. `<commit>:<path>`) through `cat-file --batch-check`.
+
+        :param rev: Any revision expression understood by Git.
+        :return: Tuple of (sha, type, size) or None if the object does not exist.
+        """
+        if self._batch_check is None or self._batch_check.poll() is not None:
+            self._batch_check = self._cat_file("--batch-check")
+        self._batch_check.stdin.write(rev.encode("utf-8") + b"\n")
+        self._batch_check.stdin.flush()
+        header = self._batch_check.stdout.readline().split()
+        if len(header) != 3:
+            return None
+        return header[0].decode(), header[1].decode(), int(header[2])
+
+    def read_object(self, rev):
+        """
+        Read the raw content of an object through `cat-file --batch`.
+
+        :param rev: Any revision expression understood by Git (usually a blob SHA).
+        :return: The object bytes or None if the object does not exist.
+        """
+        if self._batch is None or self._batch.poll() is not None:
+            self._batch = self._cat_file("--batch")
+        self._batch.stdin.write(rev.encode("utf-8") + b"\n")
+        self._batch.stdin.flush()
+        return self._read_batch_entry(self._batch.stdout)[1]
+
+    def iter_objects(self, shas):
+        """
+        Stream the content of many objects through a single `cat-file --batch` pass.
+        Requests are written from a background thread while responses are read,
+        so the pipe buffers never deadlock regardless of the number of objects.
+
+        :param shas: Iterable of object SHAs (or revision expressions).
+        :yield: Tuples of (requested sha, object bytes or None if missing).
+        """
+        shas = list(shas)
+        if not shas:
+            return
+        process = self._cat_file("--batch")
+
+        def feed():
+            try:
+                for sha in shas:
+                    process.stdin.write(sha.encode("utf-8") + b"\n")
+                process.stdin.close()
+            except (BrokenPipeError, ValueError):   # cat-file was stopped by an early exit
+                pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        completed = False
+        try:
+            for sha in shas:
+                yield sha, self._read_batch_entry(process.stdout)[1]
+            completed = True
+        finally:
+            if not completed:
+                # the consumer stopped early: stop cat-file first so a blocked writer fails instead of hanging
+                process.kill()
+            process.stdout.close()
+            writer.join()
+            process.wait()
+
+    def iter_commit_messages(self, branch):
+        """
+        Stream (commit hash, message) pairs of a branch, newest first, from a single `git log`.
+        """
+        process = subprocess.Popen(
+            ["git", "-C", self.repo_path, "log", "--format=%H%x00%B%x00", branch],
+            stdout=subprocess.PIPE
+        )
+        try:
+            buffer = b""
+            fields = []
+            for chunk in iter(lambda: process.stdout.read(1 << 16), b""):
+                buffer += chunk
+                *complete, buffer = buffer.split(b"\0")
+                fields.extend(complete)
+                while len(fields) >= 2:
+                    commit_hash, message = fields[0].strip(), fields[1]
+                    del fields[:2]
+                    yield commit_hash.decode(), message.decode("utf-8", errors="replace").strip()
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    def iter_java_hunks(self, branch):
+        """
+        Stream the changed line ranges of Java files for every commit of a branch, newest first.
+        One `rev-list | diff-tree --stdin` pipeline with zero context lines is used; merges are
+        diffed against their first parent and root commits against the empty tree.
+
+        :yield: Tuples of (commit hash, {file path: [(start, end), ...]}) on the new side of each hunk.
+        """
+        rev_list = subprocess.Popen(
+            ["git", "-C", self.repo_path, "rev-list", branch],
+            stdout=subprocess.PIPE
+        )
+        diff_tree = subprocess.Popen(
+            ["git", "-C", self.repo_path, "-c", "core.quotePath=false", "diff-tree", "--stdin", "--always",
+             "--root", "--diff-merges=first-parent", "-p", "--unified=0", "--no-color", "--", "*.java"],
+            stdin=rev_list.stdout, stdout=subprocess.PIPE
+        )
+        rev_list.stdout.close()     # diff-tree owns the pipe now
+
+        commit_hash = None
+        changes: dict[str, list[tuple[int, int]]] = {}
+        old_path = new_path = None
+        repeated = False    # inside a repeated header's block (a merge diffed against another parent)
+        try:
+            for raw_line in diff_tree.stdout:
+                line = raw_line.rstrip(b"\n")
+                if GitSession.COMMIT_LINE_REGEX.match(line):
+                    repeated = commit_hash is not None and line.decode() == commit_hash
+                    if repeated:
+                        continue
+                    if commit_hash is not None:
+                        yield commit_hash, changes
+                    commit_hash, changes = line.decode(), {}
+                elif repeated:
+                    continue
+                elif line.startswith(b"@@"):
+                    match = GitSession.HUNK_HEADER_REGEX.match(line)
+                    file_path = new_path if new_path is not None else old_path
+                    if match and file_path:
+                        start = int(match.group(1))
+                        count = int(match.group(2)) if match.group(2) else 1
+                        changes.setdefault(file_path, []).append((start, start + count - 1))
+                elif line.startswith(b"diff --git "):
+                    old_path = new_path = None
+                elif line.startswith(b"--- "):
+                    old_path = GitSession._diff_path(line[4:], b"a/")
+                elif line.startswith(b"+++ "):
+                    new_path = GitSession._diff_path(line[4:], b"b/")
+            if commit_hash is not None:
+                yield commit_hash, changes
+        finally:
+            diff_tree.stdout.close()
+            diff_tree.wait()
+            rev_list.wait()
+
+    def iter_commit_changes(self, branch):
+        """
+        Stream every commit of a branch with its message and changed Java line ranges,
+        newest first. Replaces one `get_changes_at_commit` + `get_commit_message` pair per commit.
+
+        :yield: Tuples of (commit hash, message, {file path: [(start, end), ...]}).
+        """
+        pending_changes = {}
+        hunks = self.iter_java_hunks(branch)
+        for commit_hash, message in self.iter_commit_messages(branch):
+            # both streams use the same default rev-list order; the buffer only guards against drift
+            while commit_hash not in pending_changes:
+                hunk_commit, changes = next(hunks, (None, None))
+                if hunk_commit is None:
+                    break
+                pending_changes[hunk_commit] = changes
+            yield commit_hash, message, pending_changes.pop(commit_hash, {})
+        hunks.close()
+
+    @staticmethod
+    def _diff_path(raw_path: bytes, prefix: bytes):
+        if raw_path.endswith(b"\t"):
+            raw_path = raw_path[:-1]    # git terminates unquoted paths containing a space with a tab
+        if raw_path == b"/dev/null":
+            return None
+        if raw_path.startswith(b'"') and raw_path.endswith(b'"'):
+            raw_path = raw_path[1:-1].decode("unicode_escape").encode("latin-1")
+        if raw_path.startswith(prefix):
+            raw_path = raw_path[len(prefix):]
+        return raw_path.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def _read_batch_entry(stream):
+        header = stream.readline().split()
+        if len(header) != 3:
+            return None, None
+        data = stream.read(int(header[2]))
+        stream.read(1)  # trailing newline
+        return header[0].decode(), data
+
+    def close(self):
+        """
+        Terminate the pooled `cat-file` processes and drop the object caches.
+        """
+        for process in (self._batch, self._batch_check):
+            if process is not None and process.poll() is None:
+                process.stdin.close()
+                process.wait()
+        self._batch = None
+        self._batch_check = None
+        self._commits.clear()
+        self._trees.clear()
+        self._path_indexes.clear()
+        self._java_fingerprints.clear()
+        self.repo.close()
+
+class CommitLog:
+    """
+    Compact commit history of a branch: parallel arrays of hashes, commit timestamps,
+    committer UTC offsets and parent counts, sorted by commit date in ascending order.
+    Datetimes are only materialised on demand.
+    """
+    def __init__(self, hashes: list[str], timestamps: array, tz_offsets: array, parent_counts: array):
+        self.hashes = hashes
+        self.timestamps = timestamps        # seconds since epoch
+        self.tz_offsets = tz_offsets        # committer UTC offset in seconds
+        self.parent_counts = parent_counts
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def datetime(self, idx) -> datetime:
+        tz = timezone(timedelta(seconds=self.tz_offsets[idx]))
+        return datetime.fromtimestamp(self.timestamps[idx], tz)
+
+    def pairs(self) -> list[tuple[str, datetime]]:
+        """
+        Get the history as (commit hash, commit datetime) pairs.
+        """
+        return [(commit_hash, self.datetime(idx)) for idx, commit_hash in enumerate(self.hashes)]
+
+    def to_serializable(self) -> list[tuple[str, str]]:
+        return [(commit_hash, self.datetime(idx).isoformat()) for idx, commit_hash in enumerate(self.hashes)]
+
+    @staticmethod
+    def from_serializable(commits: list) -> "CommitLog":
+        """
+        Build a log from serialized (commit hash, ISO datetime) pairs, keeping their order.
+        """
+        hashes, timestamps, tz_offsets = [], array('q'), array('i')
+        for commit_hash, commit_datetime in commits:
+            if not isinstance(commit_datetime, datetime):
+                commit_datetime = datetime.fromisoformat(commit_datetime)
+            offset = commit_datetime.utcoffset()
+            hashes.append(commit_hash)
+            timestamps.append(int(commit_datetime.timestamp()))
+            tz_offsets.append(int(offset.total_seconds()) if offset else 0)
+        return CommitLog(hashes, timestamps, tz_offsets, array('B', [0] * len(hashes)))
+
+    @staticmethod
+    def from_git(repo_path, branch) -> "CommitLog":
+        """
+        Read the history of a branch with a single `git log` call.
+        Commits are listed oldest first (reverse of the default rev-list order) and
+        then stably sorted by commit date.
+        """
+        output = subprocess.run(
+            ["git", "-C", repo_path, "log", "--reverse", "--format=%H %ct %cI %P", branch],
+            capture_output=True, check=True, text=True
+        ).stdout
+        records = []
+        for line in output.splitlines():
+            fields = line.split()
+            if len(fields) < 3:
+                continue
+            iso_date = fields[2]
+            offset = 0
+            if iso_date[-6] in "+-":
+                sign = -1 if iso_date[-6] == '-' else 1
+                offset = sign * (int(iso_date[-5:-3]) * 3600 + int(iso_date[-2:]) * 60)
+            records.append((fields[0], int(fields[1]), offset, len(fields) - 3))
+        records.sort(key=lambda r: r[1])
+        return CommitLog(
+            [r[0] for r in records],
+            array('q', (r[1] for r in records)),
+            array('i', (r[2] for r in records)),
+            array('B', (min(r[3], 255) for r in records))
+        )
+
 class GitManager:
     BASE_URL = "https://github.com/"
+    _sessions: dict[str, GitSession] = {}
+
+    @staticmethod
+    def open_session(repo_path) -> GitSession:
+        """
+        Get the shared session of a repository, opening it on first use.
+
+        :param repo_path: Path to the local Git repository.
+        :return: The GitSession for the repository.
+        """
+        key = os.path.realpath(repo_path)
+        session = GitManager._sessions.get(key)
+        if session is None:
+            session = GitSession(repo_path)
+            GitManager._sessions[key] = session
+        return session
+
+    @staticmethod
+    def close_session(repo_path):
+        """
+        Close the shared session of a repository, if any.
+
+        :param repo_path: Path to the local Git repository.
+        """
+        session = GitManager._sessions.pop(os.path.realpath(repo_path), None)
+        if session is not None:
+            session.close()
     
     @staticmethod
     @log_execution
@@ -189,11 +857,34 @@ class GitManager:
         :param branch: Branch name.
         :return: A list of commit objects.
         """
-        repo = Repo(repo_path)
-        commits = list(repo.iter_commits(branch))[::-1]
-        commit_pairs = [(commit.hexsha, commit.committed_datetime) for commit in commits]
-        commit_pairs.sort(key=lambda x: x[1])
-        return commit_pairs
+        return GitManager.get_commit_log(repo_path, branch).pairs()
+    
+    @staticmethod
+    def get_commit_log(repo_path, branch) -> CommitLog:
+        """
+        Get the compact commit history of a branch, sorted by commit date in ascending order.
+
+        :param repo_path: Path to the local Git repository.
+        :param branch: Branch name.
+        :return: A CommitLog with hashes, timestamps, UTC offsets and parent counts.
+        """
+        return CommitLog.from_git(repo_path, branch)
+    
+    @staticmethod
+    def get_first_parent_chain(repo_path, branch) -> list[str]:
+        """
+        Get the first-parent chain of a branch, oldest first. Each commit of the chain is an
+        ancestor of the next one, so consecutive chain commits delimit disjoint history ranges.
+
+        :param repo_path: Path to the local Git repository.
+        :param branch: Branch name.
+        :return: A list of commit hashes.
+        """
+        output = subprocess.run(
+            ["git", "-C", repo_path, "rev-list", "--first-parent", "--reverse", branch],
+            capture_output=True, check=True, text=True
+        ).stdout
+        return output.split()
     
     @staticmethod
     def get_file_content_at_commit(repo_path, commit_hash, file_path):
@@ -205,20 +896,29 @@ class GitManager:
         :param file_path: Path to the file.
         :return: The content of the file at the given commit.
         """
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
-        tree = commit.tree
-
-        # Traverse the tree to find the file with the ending path
-        for item in tree.traverse():
-            if item.path.endswith(file_path):
-                file_bytes = item.data_stream.read()
-                detected = chardet.detect(file_bytes)
-                encoding = detected["encoding"] if detected["encoding"] else "utf-8"
-                file_content = file_bytes.decode(encoding, errors="replace")
-                return file_content
+        blob_sha = GitManager.get_blob_sha_at_commit(repo_path, commit_hash, file_path)
+        if blob_sha is None:
+            return None
+        
+        session = GitManager.open_session(repo_path)
+        return session.decoder.decode(session.read_object(blob_sha), file_path)
+    
+    @staticmethod
+    def get_blob_sha_at_commit(repo_path, commit_hash, file_path):
+        """
+        Get the SHA of the blob whose path ends with the given file path at a specific commit.
 
-        return None
+        :param repo_path: Path to the local Git repository.
+        :param commit_hash: Hash of the commit.
+        :param file_path: Path (suffix) of the file.
+        :return: The blob SHA or None if no file matches.
+        """
+        index = GitManager.open_session(repo_path).path_index(commit_hash)
+        if index is None:
+            return None
+        
+        idx = index.find(file_path)
+        return index.shas[idx] if idx is not None else None
     
     @staticmethod
     def get_changes_at_commit(repo_path, commit_hash):
@@ -229,8 +929,7 @@ class GitManager:
         :param commit_hash: Hash of the commit.
         :return: A dict mapping file paths to sets of changed line numbers.
         """
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
+        commit = GitManager.open_session(repo_path).commit(commit_hash)
         parent = commit.parents[0] if commit.parents else None
         changes = {}
 
@@ -271,11 +970,73 @@ class GitManager:
         :param commit_hash: Hash of the commit.
         :return: The commit message.
         """
-        repo = Repo(repo_path)
-        commit = repo.commit(commit_hash)
+        commit = GitManager.open_session(repo_path).commit(commit_hash)
         return commit.message.strip()
     
+class MethodEndLineCache:
+    """
+    Content-addressed LRU cache of method end lines keyed by (blob SHA, method start line, method name).
+    A file that does not change between commits keeps its blob SHA, so its end lines
+    are computed once. Optionally persisted as JSON so re-runs reuse previous results.
+    """
+    def __init__(self, max_size=100_000, file_path=None, version=None):
+        self.max_size = max_size
+        self.file_path = file_path
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, int, str], int] = OrderedDict()
+        if file_path:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, blob_sha, start_line, method_name):
+        """
+        Get a cached end line, or None if the entry is not cached.
+        """
+        key = (blob_sha, start_line, method_name)
+        end_line = self._entries.get(key)
+        if end_line is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return end_line
+
+    def put(self, blob_sha, start_line, method_name, end_line):
+        key = (blob_sha, start_line, method_name)
+        self._entries[key] = end_line
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def load(self):
+        """
+        Load persisted entries. Entries written by a different algorithm version are ignored.
+        """
+        data = FileUtils.load_json_file(self.file_path)
+        if data.get("version") != self.version:
+            return
+        for blob_sha, start_line, method_name, end_line in data.get("entries", []):
+            self.put(blob_sha, start_line, method_name, end_line)
+
+    def save(self):
+        if not self.file_path:
+            return
+        FileUtils.save_json_file(self.file_path, {
+            "version": self.version,
+            # [blob SHA, start line, method name, end line] lists keep the key fields typed (e.g. a None name)
+            "entries": [
+                [blob_sha, start_line, method_name, end_line]
+                for (blob_sha, start_line, method_name), end_line in self._entries.items()
+            ]
+        })
+
 class GitUtils:
+    METHOD_END_LINE_VERSION = 5     # bump when get_method_end_line changes its results (or the cache key)
+    
     @staticmethod
     def get_method_end_line_at_commit(repo_path, commit_hash, file_path, method_name, start_line):
         """
@@ -295,37 +1056,70 @@ class GitUtils:
         else:
             return GitUtils.get_method_end_line(file_content, method_name, start_line)
     
+    @staticmethod
+    def get_methods_end_lines(repo_path, methods_info_map: dict[str, dict[str, dict[str, list]]], cache: MethodEndLineCache = None):
+        """
+        Resolve the end lines of many methods in one batch.
+        Each (commit, file) is resolved to its blob once, every distinct blob is read
+        in a single streaming `cat-file --batch` pass and decoded once, and all methods
+        requested for that blob are answered together.
+
+        :param repo_path: Path to the local Git repository.
+        :param methods_info_map: {commit_hash: {file_path: {method_name: [start_line, end_line]}}}.
+            The end line slot of every entry is filled in place (-1 if not found).
+        :param cache: Optional blob-keyed cache; only blobs with uncached methods are read.
+        """
+        blob_requests: dict[str, list[dict]] = {}
+        blob_paths: dict[str, str] = {}
+        for commit_hash, files_data in methods_info_map.items():
+            for file_path, methods_data in files_data.items():
+                blob_sha = GitManager.get_blob_sha_at_commit(repo_path, commit_hash, file_path)
+                if blob_sha is None:
+                    for method_range in methods_data.values():
+                        method_range[1] = -1
+                    continue
+                
+                pending = {}
+                for method_name, method_range in methods_data.items():
+                    end_line = cache.get(blob_sha, method_range[0], method_name) if cache is not None else None
+                    if end_line is None:
+                        pending[method_name] = method_range
+                    else:
+                        method_range[1] = end_line
+                if pending:
+                    blob_requests.setdefault(blob_sha, []).append(pending)
+                    blob_paths.setdefault(blob_sha, file_path)
+
+        session = GitManager.open_session(repo_path)
+        for blob_sha, file_bytes in session.iter_objects(blob_requests):
+            # single scan of the blob answers every method requested in it
+            if file_bytes is not None:
+                source_ranges = JavaSourceRanges(session.decoder.decode(file_bytes, blob_paths[blob_sha]))
+            else:
+                source_ranges = None
+            for methods_data in blob_requests[blob_sha]:
+                for method_name, method_range in methods_data.items():
+                    if source_ranges is None:   # unreadable blob, not cached so a later run retries it
+                        method_range[1] = -1
+                        continue
+                    method_range[1] = source_ranges.method_end_line(method_range[0], method_name)
+                    if cache is not None:
+                        cache.put(blob_sha, method_range[0], method_name, method_range[1])
+    
     @staticmethod
     def get_method_end_line(file_content: str, method_name, start_line):
         """
-        Get the end line number of a method in a Java file using regex.
+        Get the end line number of a method in a Java file.
         
         Args:
-            file_path (str): Path to the Java file.
+            file_content (str): Content of the Java file.
             method_name (str): Name of the method.
-            start_line (int): Starting line number of the method.
+            start_line (int): Starting line number of the method (1-based).
 
         Returns:
-            int: End line number of the method. Returns -1 if not found.
+            int: End line number (1-based line of the closing brace) of the method. Returns -1 if not found.
         """
-        lines = file_content.splitlines()
-
-        # Extract the method body based on curly braces
-        brace_count = 0
-        inside_method = False
-
-        for i, line in enumerate(lines[start_line:], start=start_line):
-            if '{' in line:
-                inside_method = True
-                brace_count += line.count('{') - line.count('}')
-                continue
-
-            if inside_method:
-                brace_count += line.count('{') - line.count('}')
-                if brace_count == 0:
-                    return i  # Current line is the end of the method
-
-        return -1
+        return JavaSourceRanges(file_content).method_end_line(start_line, method_name)
 
 def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
     if not ranges:
@@ -1,18 +1,30 @@
 import os
+import io
+import shutil
 import argparse
 import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import config
 from corpus import prepare_repo
 
-def zip_dir(dir_path, zip_path):
+def zip_dir(dir_path, zip_path, append=False):
     """
     Zip a directory.
 
     :param dir_path: Path to the directory to be zipped.
     :param zip_path: Path to the output zip file.
+    :param append: Add the files to an existing zip file instead of overwriting it. The files are
+        appended to a copy of the archive, which only replaces it once complete.
+    :return: True if the directory was zipped.
     """
+    tmp_path = f"{zip_path}.tmp"
     try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        mode = 'w'
+        if append and os.path.exists(zip_path):
+            shutil.copyfile(zip_path, tmp_path)
+            mode = 'a'
+        with zipfile.ZipFile(tmp_path, mode, zipfile.ZIP_DEFLATED) as zipf:
             if os.path.isdir(dir_path):
                 for root, dirs, files in os.walk(dir_path):
                     for file in files:
@@ -21,9 +33,15 @@ def zip_dir(dir_path, zip_path):
                         zipf.write(file_path, arcname)
             else:
                 zipf.write(dir_path, os.path.basename(dir_path))
+        os.replace(tmp_path, zip_path)     # an interrupted run never leaves a broken archive behind
         print(f"Successfully compressed '{dir_path}'.")
+        return True
     except Exception as e:
         print(f"Error while zipping '{dir_path}': {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
 def unzip_file(zip_path, extract_to):
     """
     Unzip a file.
@@ -37,6 +55,101 @@ def unzip_file(zip_path, extract_to):
         print(f"Successfully extracted '{zip_path}' to '{extract_to}'.")
     except Exception as e:
         print(f"Error while extracting '{zip_path}': {e}")
+
+class ZipDataset:
+    """
+    Read-only view over the members of a zip archive (e.g. `smells_<idx>.zip`), streamed
+    straight out of the archive instead of being extracted to disk first.
+    """
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self._zip = zipfile.ZipFile(zip_path, 'r')
+        self.names = self._zip.namelist()
+        self._name_set = set(self.names)
+        self._local = threading.local()     # per-thread archive handles for parallel reads
+        self._thread_zips: list[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def exists(self, member):
+        return member in self._name_set
+
+    def list_dirs(self) -> list[str]:
+        """
+        Get the top-level directories of the archive, in archive order.
+        """
+        dirs = {}
+        for name in self.names:
+            if '/' in name:
+                dirs[name.split('/', 1)[0]] = None
+        return list(dirs)
+
+    def open_text(self, member) -> io.TextIOWrapper:
+        """
+        Open a member as a text stream (decompressed on the fly).
+        """
+        return io.TextIOWrapper(self._zip.open(member, 'r'))
+
+    def read(self, member) -> bytes:
+        return self._zip.read(member)
+
+    def _thread_read(self, member) -> bytes:
+        if not hasattr(self._local, "zip"):
+            self._local.zip = zipfile.ZipFile(self.zip_path, 'r')
+            with self._lock:
+                self._thread_zips.append(self._local.zip)
+        return self._local.zip.read(member)
+
+    def iter_members(self, members: list[str], workers=1, window=256):
+        """
+        Read members in order, decompressing up to `window` members ahead on `workers` threads.
+
+        :yield: Tuples of (member name, member bytes).
+        """
+        if workers <= 1:
+            for member in members:
+                yield member, self.read(member)
+            return
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for start in range(0, len(members), window):
+                    batch = members[start:start + window]
+                    yield from zip(batch, executor.map(self._thread_read, batch))
+        finally:
+            for thread_zip in self._thread_zips:
+                thread_zip.close()
+            self._thread_zips = []
+            self._local = threading.local()
+
+    def close(self):
+        self._zip.close()
+
+_open_datasets: dict[tuple[int, str], ZipDataset] = {}
+
+def open_zip_dataset(zip_path) -> ZipDataset:
+    """
+    Get a ZipDataset for an archive, opened once per process (used by pool workers).
+    Datasets are keyed by process id, so a forked worker never reuses the file handle
+    (and file offset) of its parent.
+    """
+    key = (os.getpid(), zip_path)
+    if key not in _open_datasets:
+        _open_datasets[key] = ZipDataset(zip_path)
+    return _open_datasets[key]
+
+def close_zip_datasets():
+    """
+    Close the datasets opened by `open_zip_dataset` in this process.
+    """
+    pid = os.getpid()
+    for key in [key for key in _open_datasets if key[0] == pid]:
+        _open_datasets.pop(key).close()
     
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="zip/unzip a directory.")